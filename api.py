@@ -0,0 +1,298 @@
+import hashlib
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from counters import book_shows
+from forms import Genres, ShowForm
+from models import db, Venue, Artist, Show, Genre, venue_genres, artist_genres
+from pagination import keyset_page, InvalidCursor
+from queries import shows_listing_query, SHOWS_ORDER
+from scheduling import show_end, find_conflicts
+from search import search_by_name
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+# The app's own 400/404/500 handlers render HTML pages; Flask prefers a
+# blueprint handler for the same code over them.
+@api.errorhandler(400)
+@api.errorhandler(404)
+@api.errorhandler(413)
+@api.errorhandler(500)
+@api.errorhandler(HTTPException)
+def json_error(error):
+    return jsonify({'error': error.name, 'message': error.description}), error.code
+
+
+# ----------------------------------------------------------------------------#
+# Helpers.
+# ----------------------------------------------------------------------------#
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def requested_fields(available):
+    """The ``?fields=`` projection, or ``None`` for every field."""
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    if not fields:
+        return None
+    unknown = set(fields) - set(available)
+    if unknown:
+        abort(400, 'Unknown fields: ' + ', '.join(sorted(unknown)))
+    return fields
+
+
+def project(item, fields):
+    return {key: _jsonable(item[key]) for key in (fields or item)}
+
+
+def page_limit():
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+
+def page(query, columns):
+    try:
+        return keyset_page(query, columns, request.args.get('cursor'), page_limit())
+    except InvalidCursor:
+        abort(400, 'Invalid cursor')
+
+
+def conditional(versions, build):
+    """Respond with ``build()`` as JSON under a strong ETag derived from ``versions``.
+
+    ``versions`` identifies the state of every row in the response, and of
+    its ``next_cursor`` if paginated, so a client whose ``If-None-Match``
+    still matches gets a 304 before the body is built.
+    """
+    etag = hashlib.sha1(json.dumps([request.full_path, versions], default=str).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def owner_fields(model):
+    return [column.key for column in model.__table__.columns] + ['genres']
+
+
+def owner_listing(model, genre_table):
+    fields = requested_fields(owner_fields(model))
+    # The counter changes with bookings, which leave the version alone.
+    query = db.session.query(model.id, model.version, model.upcoming_shows_count)
+    genre = request.args.get('genre')
+    if genre:
+        if genre not in {g.value for g in Genres}:
+            abort(400, 'Unknown genre')
+        query = query.join(genre_table).join(Genre).filter(Genre.name == genre)
+    keys, next_cursor = page(query, [model.id])
+
+    def build():
+        rows = model.query.options(selectinload(model.genres)) \
+            .filter(model.id.in_([key.id for key in keys])) \
+            .order_by(model.id)
+        return {'data': [project(row.as_dict(), fields) for row in rows], 'next_cursor': next_cursor}
+
+    return conditional([[[key.id, key.version, key.upcoming_shows_count] for key in keys], next_cursor], build)
+
+
+def owner_detail(model, id_):
+    fields = requested_fields(owner_fields(model))
+    version = db.session.query(model.version, model.upcoming_shows_count).filter(model.id == id_).first()
+    if version is None:
+        abort(404)
+    return conditional(list(version), lambda: {
+        'data': project(model.query.options(joinedload(model.genres)).get(id_).as_dict(), fields)
+    })
+
+
+def owner_search(model, fts_table):
+    fields = requested_fields(['id', 'name', 'upcoming_shows_count'])
+    search_term = request.args.get('q', '')
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    total, rows = search_by_name(model, fts_table, search_term, page_limit(), offset)
+    # Search rows are small, so they are their own version.
+    return conditional([total] + [list(row) for row in rows], lambda: {
+        'count': total,
+        'data': [project(row._asdict(), fields) for row in rows],
+    })
+
+
+# Version columns of the venue and artist a show is listed with.
+SHOW_VERSION_COLUMNS = ('venue_version', 'artist_version')
+
+
+def shows_query(since=None):
+    return shows_listing_query(since).add_columns(
+        Venue.version.label('venue_version'), Artist.version.label('artist_version'))
+
+
+def show_fields(query):
+    return [c['name'] for c in query.column_descriptions if c['name'] not in SHOW_VERSION_COLUMNS]
+
+
+def show_versions(row):
+    return [row.id, row.venue_version, row.artist_version]
+
+
+# ----------------------------------------------------------------------------#
+# Venues.
+# ----------------------------------------------------------------------------#
+
+@api.route('/venues')
+@db.reads_from_replica
+def venues():
+    return owner_listing(Venue, venue_genres)
+
+
+@api.route('/venues/search')
+@db.reads_from_replica
+def search_venues():
+    return owner_search(Venue, 'venue_fts')
+
+
+@api.route('/venues/<int:venue_id>')
+@db.reads_from_replica
+def venue(venue_id):
+    return owner_detail(Venue, venue_id)
+
+
+# ----------------------------------------------------------------------------#
+# Artists.
+# ----------------------------------------------------------------------------#
+
+@api.route('/artists')
+@db.reads_from_replica
+def artists():
+    return owner_listing(Artist, artist_genres)
+
+
+@api.route('/artists/search')
+@db.reads_from_replica
+def search_artists():
+    return owner_search(Artist, 'artist_fts')
+
+
+@api.route('/artists/<int:artist_id>')
+@db.reads_from_replica
+def artist(artist_id):
+    return owner_detail(Artist, artist_id)
+
+
+# ----------------------------------------------------------------------------#
+# Shows.
+# ----------------------------------------------------------------------------#
+
+@api.route('/shows')
+@db.reads_from_replica
+def shows():
+    include_past = request.args.get('include_past', 0, type=int)
+    query = shows_query(None if include_past else datetime.now())
+    fields = requested_fields(show_fields(query))
+    for arg, column in (('venue_id', Show.venue_id), ('artist_id', Show.artist_id)):
+        value = request.args.get(arg, type=int)
+        if value is not None:
+            query = query.filter(column == value)
+    rows, next_cursor = page(query, SHOWS_ORDER)
+    return conditional([[show_versions(row) for row in rows], next_cursor], lambda: {
+        'data': [project(row._asdict(), fields or show_fields(query)) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@api.route('/shows/<int:show_id>')
+@db.reads_from_replica
+def show(show_id):
+    query = shows_query()
+    fields = requested_fields(show_fields(query))
+    row = query.filter(Show.id == show_id).first()
+    if row is None:
+        abort(404)
+    return conditional(show_versions(row), lambda: {
+        'data': project(row._asdict(), fields or show_fields(query)),
+    })
+
+
+def _validate_booking(item):
+    """``(Show, None)`` for a valid batch item, else ``(None, errors)``."""
+    if not isinstance(item, dict):
+        return None, {'show': ['Expected an object.']}
+    form = ShowForm(formdata=MultiDict({key: str(value) for key, value in item.items() if value is not None}),
+                    meta={'csrf': False})
+    if not form.validate():
+        return None, form.errors
+    return Show(venue_id=form.venue_id.data, artist_id=form.artist_id.data, start_time=form.start_time.data,
+                end_time=show_end(form.start_time.data, form.duration.data)), None
+
+
+@api.route('/shows/batch', methods=['POST'])
+def schedule_shows():
+    """Book many shows in one transaction, all or none.
+
+    Takes ``{"shows": [{"artist_id", "venue_id", "start_time", "duration"}]}``
+    and answers 201 with the created shows, 422 with per-item validation
+    errors, or 409 with the items that double-book a venue, either against
+    stored shows or against an earlier item of the same batch.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('shows') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        abort(400, 'Expected {"shows": [...]} with at least one show.')
+    if len(items) > current_app.config['API_MAX_BATCH_SIZE']:
+        abort(413, f'At most {current_app.config["API_MAX_BATCH_SIZE"]} shows per batch.')
+
+    shows, errors = [], []
+    for index, item in enumerate(items):
+        show, item_errors = _validate_booking(item)
+        if item_errors:
+            errors.append({'index': index, 'errors': item_errors})
+        shows.append(show)
+    if not errors:
+        venue_ids = {show.venue_id for show in shows}
+        artist_ids = {show.artist_id for show in shows}
+        known_venues = {id_ for id_, in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+        known_artists = {id_ for id_, in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+        for index, show in enumerate(shows):
+            item_errors = {}
+            if show.venue_id not in known_venues:
+                item_errors['venue_id'] = ['Unknown venue.']
+            if show.artist_id not in known_artists:
+                item_errors['artist_id'] = ['Unknown artist.']
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+    if errors:
+        return jsonify({'error': 'Unprocessable Entity', 'errors': errors}), 422
+
+    conflicts = []
+    for index, conflict in enumerate(find_conflicts([(s.venue_id, s.start_time, s.end_time) for s in shows])):
+        if conflict:
+            kind, ref = conflict
+            conflicts.append({'index': index, 'show_id' if kind == 'show' else 'batch_index': ref})
+    if conflicts:
+        return jsonify({'error': 'Conflict', 'conflicts': conflicts}), 409
+
+    try:
+        book_shows(shows)
+        db.session.add_all(shows)
+        db.session.commit()
+    except IntegrityError:
+        # Another booking got in between the check and the insert; the
+        # exclusion constraint (or SQLite trigger) refused the overlap.
+        db.session.rollback()
+        abort(409, 'A venue was booked concurrently; check the schedule and retry.')
+
+    current_app.extensions['response_cache'].invalidate(
+        'shows', 'venues',
+        *{f'venue:{show.venue_id}' for show in shows},
+        *{f'artist:{show.artist_id}' for show in shows})
+    return jsonify({'data': [project(show.as_dict(), None) for show in shows]}), 201
@@ -2,483 +2,231 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
-import dateutil.parser
-import babel
-from flask import render_template, request, flash, redirect, url_for, Flask
+import json
 import logging
 from logging import Formatter, FileHandler
-from flask_migrate import Migrate
-from flask_moment import Moment
-from sqlalchemy import and_, func
-from forms import *
-
-# ----------------------------------------------------------------------------#
-# App Config.
-# ----------------------------------------------------------------------------#
-from models import db, Venue, Show, Artist
-
-app = Flask(__name__)
-db.init_app(app)
-app.config.from_object('config')
-moment = Moment(app)
-migrate = Migrate(app, db)
 
+import click
+from flask import Blueprint, Flask, current_app, jsonify, render_template
+from flask.cli import AppGroup, with_appcontext
+
+from models import db
+from extensions import cache, instrumentation, assets, autocomplete, health
+from views import format_datetime
+from venues import bp as venues_bp
+from artists import bp as artists_bp
+from shows import bp as shows_bp
+from feeds import bp as feeds_bp
+from api import api
+from counters import rollover_shows, recount_upcoming_shows, rebuild_venue_areas
+from importer import Importer, KINDS as IMPORT_KINDS, read_records
+from queries import hot_queries, explain
+from startup import profile_startup
 
 # ----------------------------------------------------------------------------#
-# Models.
-# ----------------------------------------------------------------------------#
-# Done: implement any missing fields, as a database migration using Flask-Migrate
-
-# Done: implement any missing fields, as a database migration using Flask-Migrate
-
-
-# Done Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
-
-# ----------------------------------------------------------------------------#
-# Filters.
+# App Config.
 # ----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(str(value))
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
 
+def create_app(config='config', **settings):
+    """Build the Fyyur app from ``config`` (an import path or object), then ``settings``.
+
+    Tests and benchmarks pass settings to get differently configured apps;
+    the Flask CLI and WSGI servers call it with the defaults.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.config.update(settings)
+
+    db.init_app(app)
+    if app.config['MIGRATIONS_ENABLED']:
+        # Alembic is the largest import of the app and only `flask db` needs it.
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    cache.init_app(app)
+    instrumentation.init_app(app)
+    assets.init_app(app)
+    autocomplete.init_app(app)
+    health.init_app(app)
+
+    app.jinja_env.filters['datetime'] = format_datetime
+    app.register_blueprint(main)
+    app.register_blueprint(venues_bp)
+    app.register_blueprint(artists_bp)
+    app.register_blueprint(shows_bp)
+    app.register_blueprint(feeds_bp)
+    app.register_blueprint(api)
+
+    for command in (shows_cli, rollup_cli, import_command, explain_command, assets_command, startup_profile_command):
+        app.cli.add_command(command)
+
+    if app.config.get('LOG_FILE'):
+        file_handler = FileHandler(app.config['LOG_FILE'])
+        file_handler.setFormatter(
+            Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
 
-app.jinja_env.filters['datetime'] = format_datetime
+    return app
 
 
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
+# Venue, artist and show pages are in venues.py, artists.py and shows.py.
 
-@app.route('/')
-def index():
-    return render_template('pages/home.html')
-
-
-#  Venues
-#  ----------------------------------------------------------------
-
-@app.route('/venues')
-def venues():
-    # DONE: replace with real venues data.
-    #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
-    cities = db.session.query(Venue.city, Venue.state) \
-        .group_by(Venue.city, Venue.state) \
-        .all()
-
-    data = []
-    for city in cities:
-        citydata = dict(city)
-        venues = db.session.query(
-            Venue.id,
-            Venue.name,
-        ).filter(
-            and_(
-                Venue.city == city.city,
-                Venue.state == city.state
-            )
-        ).all()
-        citydata['venues'] = [{
-            'id': v.id,
-            'name': v.name,
-            'num_upcoming_shows': Show.query.filter(Show.venue_id == v.id).count()
-        } for v in venues]
-        data.append(citydata)
-
-    return render_template('pages/venues.html', areas=data)
-
-
-@app.route('/venues/search', methods=['POST'])
-def search_venues():
-    # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
-    # seach for Hop should return "The Musical Hop".
-    # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
-    search_term = request.form.get('search_term', '')
-    results = Venue.query.filter(func.lower(Venue.name).like(f'%{search_term.lower()}%')).all()
-    response = {
-        "count": len(results),
-        "data": [{
-            "id": result.id,
-            "name": result.name,
-            "num_upcoming_shows": Show.query.filter(Show.start_time > datetime.now(),
-                                                    Show.venue_id == result.id).count()
-        } for result in results]
-    }
-    # response = {
-    #     "count": 1,
-    #     "data": [{
-    #         "id": 2,
-    #         "name": "The Dueling Pianos Bar",
-    #         "num_upcoming_shows": 0,
-    #     }]
-    # }
-    return render_template('pages/search_venues.html', results=response,
-                           search_term=search_term)
-
-
-@app.route('/venues/<int:venue_id>')
-def show_venue(venue_id):
-    # shows the venue page with the given venue_id
-    # Done: replace with real venue data from the venues table, using venue_id
-    venue = Venue.query.get(venue_id).as_dict()
-    venue['genres'] = [genre for genre in venue['genres'].split(',')]
-    venue['past_shows'] = Show.query.filter(Show.start_time <= datetime.now()).all()
-    venue['past_shows_count'] = Show.query.filter(Show.start_time <= datetime.now(), Show.venue_id == venue_id).count()
-    venue['upcoming_shows'] = Show.query.filter(Show.start_time > datetime.now()).all()
-    venue['upcoming_shows_count'] = Show.query.filter(Show.start_time > datetime.now(),
-                                                      Show.venue_id == venue_id).count()
-    return render_template('pages/show_venue.html', venue=venue)
-
-
-#  Create Venue
-#  ----------------------------------------------------------------
-
-@app.route('/venues/create', methods=['GET'])
-def create_venue_form():
-    form = VenueForm()
-    return render_template('forms/new_venue.html', form=form)
-
-
-@app.route('/venues/create', methods=['POST'])
-def create_venue_submission():
-    # Done: insert form data as a new Venue record in the db, instead
-    # Done: modify data to be the data object returned from db insertion
-
-    try:
-        venue = Venue(
-            name=request.form['name'],
-            city=request.form['city'],
-            state=request.form['state'],
-            address=request.form['address'],
-            phone=request.form['phone'],
-            genres=request.form['genres'],
-            facebook_link=request.form['facebook_link'],
-            image_link=request.form['image_link'],
-            website=request.form['website_link'],
-            seeking_description=request.form['seeking_description']
-        )
-        db.session.add(venue)
-        db.session.commit()
-        # on successful db insert, flash success
-        flash('Venue ' + request.form['name'] + ' was successfully listed!')
-        # Done: on unsuccessful db insert, flash an error instead.
-        # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
-        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
-    except Exception as err:
-        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed. ' + str(err))
-        db.session.rollback()
-    finally:
-        db.session.close()
-
-    return render_template('pages/home.html')
+main = Blueprint('main', __name__)
 
 
-@app.route('/venues/<venue_id>/delete', methods=['POST'])
-def delete_venue(venue_id):
-    # Done: Complete this endpoint for taking a venue_id, and using
-    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
-    try:
-        venue = Venue.query.get(venue_id)
-        db.session.delete(venue)
-        db.session.commit()
-        flash('Venue ' + venue.name + ' was deleted!')
-    except Exception as err:
-        flash('Error deleting Venue! ' + str(err))
-        db.session.rollback()
-    finally:
-        db.session.close()
-
-    return render_template('pages/home.html')
-    # Done: BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
-    # clicking that button delete it from the db then redirect the user to the homepage
-
-
-#  Artists
-#  ----------------------------------------------------------------
-@app.route('/artists')
-def artists():
-    # Done: replace with real data returned from querying the database
-    data = Artist.query.all()
-    return render_template('pages/artists.html', artists=data)
-
-
-@app.route('/artists/search', methods=['POST'])
-def search_artists():
-    # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
-    # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
-    # search for "band" should return "The Wild Sax Band".
-    search_term = request.form.get('search_term', '')
-    results = Artist.query.filter(func.lower(Artist.name).like(f'%{search_term.lower()}%')).all()
-    response = {
-        "count": len(results),
-        "data": [{
-            "id": result.id,
-            "name": result.name,
-            "num_upcoming_shows": Show.query.filter(Show.start_time > datetime.now(),
-                                                    Show.artist_id == result.id).count()
-        } for result in results]
-    }
-    # response = {
-    #     "count": 1,
-    #     "data": [{
-    #         "id": 4,
-    #         "name": "Guns N Petals",
-    #         "num_upcoming_shows": 0,
-    #     }]
-    # }
-    return render_template('pages/search_artists.html', results=response,
-                           search_term=request.form.get('search_term', ''))
-
-
-@app.route('/artists/<int:artist_id>')
-def show_artist(artist_id):
-    # shows the artist page with the given artist_id
-    # Done: replace with real artist data from the artist table, using artist_id
-    artist = Artist.query.get(artist_id).as_dict()
-    artist['genres'] = [genre for genre in artist['genres'].split(',')]
-    past_shows = Show.query.filter(Show.start_time <= datetime.now(), Show.artist_id == artist_id).all()
-    upcoming_shows = Show.query.filter(Show.start_time > datetime.now(), Show.artist_id == artist_id).all()
-    artist['past_shows'] = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": Venue.query(Venue.name).get(show.venue_id),
-            "venue_image_link": Venue.query(Venue.image_link).get(show.venue_id),
-            "start_time": show.start_time
-        } for show in past_shows
-    ]
-    artist['upcoming_shows'] = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": Venue.query(Venue.name).get(show.venue_id),
-            "venue_image_link": Venue.query(Venue.image_link).get(show.venue_id),
-            "start_time": show.start_time
-        } for show in upcoming_shows
-    ]
-    artist['past_shows_count'] = len(past_shows)
-    artist['upcoming_shows_count'] = len(upcoming_shows)
-
-    return render_template('pages/show_artist.html', artist=artist)
-
-
-#  Update
-#  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
-def edit_artist(artist_id):
-    form = ArtistForm()
-    artist = Artist.query.get(artist_id)
-    form.name.process_data(artist.name)
-    form.genres.process_data(artist.genres)
-    form.city.process_data(artist.city)
-    form.state.process_data(artist.state)
-    form.phone.process_data(artist.phone)
-    form.website_link.process_data(artist.website)
-    form.facebook_link.process_data(artist.facebook_link)
-    form.seeking_venue.process_data(artist.seeking_venue)
-    form.seeking_description.process_data(artist.seeking_description)
-    form.image_link.process_data(artist.image_link)
-    # Done: populate form with fields from artist with ID <artist_id>
-    return render_template('forms/edit_artist.html', form=form, artist=artist)
-
-
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
-def edit_artist_submission(artist_id):
-    # Done: take values from the form submitted, and update existing
-    # artist record with ID <artist_id> using the new attributes
-    try:
-        artist = Artist.query.get(artist_id)
-        artist.name = request.form.get('name')
-        artist.genres = request.form.get('genres')
-        artist.city = request.form.get('city')
-        artist.state = request.form.get('state')
-        artist.phone = request.form.get('phone')
-        artist.website = request.form.get('website_link')
-        artist.facebook_link = request.form.get('facebook_link')
-        artist.seeking_venue = request.form.get('seeking_venue')
-        artist.seeking_description = request.form.get('seeking_description')
-        artist.image_link = request.form.get('image_link')
-        db.session.commit()
-        flash('Artist updated successfully!')
-    except Exception as err:
-        db.session.rollback()
-        flash('Error updating artist! ' + str(err))
-    finally:
-        db.session.close()
-
-    return redirect(url_for('show_artist', artist_id=artist_id))
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
-def edit_venue(venue_id):
-    form = VenueForm()
-    venue = Venue.query.get(venue_id)
-    form.name.process_data(venue.name)
-    for genre in venue.genres:
-        for c in form.genres.iter_choices():
-            if c[0] == genre:
-                form.genres.process_data(c)
-    form.address.process_data(venue.address)
-    form.city.process_data(venue.city)
-    form.state.process_data(venue.state)
-    form.phone.process_data(venue.phone)
-    form.website_link.process_data(venue.website)
-    form.facebook_link.process_data(venue.facebook_link)
-    form.seeking_talent.process_data(venue.seeking_talent)
-    form.seeking_description.process_data(venue.seeking_description)
-    form.image_link.process_data(venue.image_link)
-
-    # Done: populate form with values from venue with ID <venue_id>
-    return render_template('forms/edit_venue.html', form=form, venue=venue)
-
-
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
-def edit_venue_submission(venue_id):
-    # Done: take values from the form submitted, and update existing
-    # venue record with ID <venue_id> using the new attributes
-    try:
-        venue = Venue.query.get(venue_id)
-        venue.name = request.form.get('name')
-        venue.city = request.form.get('city')
-        venue.state = request.form.get('state')
-        venue.address = request.form.get('address')
-        venue.phone = request.form.get('phone')
-        venue.genres = request.form.get('genres')
-        venue.facebook_link = request.form.get('facebook_link')
-        venue.image_link = request.form.get('image_link')
-        venue.website = request.form.get('website_link')
-        venue.seeking_description = request.form.get('seeking_description')
-        db.session.commit()
-        flash('Venue updated successfully!')
-    except Exception as err:
-        db.session.rollback()
-        flash('Error updating venue!' + str(err))
-    finally:
-        db.session.close()
-
-    return redirect(url_for('show_venue', venue_id=venue_id))
-
-
-#  Create Artist
-#  ----------------------------------------------------------------
-
-@app.route('/artists/create', methods=['GET'])
-def create_artist_form():
-    form = ArtistForm()
-    return render_template('forms/new_artist.html', form=form)
-
-
-@app.route('/artists/create', methods=['POST'])
-def create_artist_submission():
-    try:
-        artist = Artist(
-            name=request.form['name'],
-            city=request.form['city'],
-            genres=request.form['genres'],
-            image_link=request.form['image_link'],
-            phone=request.form['phone'],
-            seeking_description=request.form['seeking_description'],
-            seeking_venue='seeking_venue' in request.form,
-            state=request.form['state'],
-            website=request.form['website_link'],
-            facebook_link=request.form['facebook_link']
-        )
-
-        db.session.add(artist)
-        db.session.commit()
-        flash('Artist ' + artist.name + ' was listed successfully!')
-    except Exception as err:
-        flash('Error when adding new artist! ' + str(err))
-        db.session.rollback()
-    finally:
-        db.session.close()
+@main.route('/')
+def index():
     return render_template('pages/home.html')
 
 
-#  Shows
-#  ----------------------------------------------------------------
-
-@app.route('/shows')
-def shows():
-    # displays list of shows at /shows
-    # Done: replace with real venues data.
-    shows = Show.query.all()
-    for show in shows:
-        show = show.as_dict()
-        show['venue_name'] = Venue.query.get(show['venue_id']).name
-        show['artist_name'] = Artist.query.get(show['artist_id']).name
-        show['artist_image_link'] = Artist.query.get(show['artist_id']).image_link
+@main.route('/cache/stats')
+def cache_stats():
+    return jsonify(cache.stats())
 
-    return render_template('pages/shows.html', shows=shows)
 
+@main.route('/db/stats')
+def db_stats():
+    return jsonify(db.pool_stats())
 
-@app.route('/shows/create')
-def create_shows():
-    # renders form. do not touch.
-    form = ShowForm()
-    return render_template('forms/new_show.html', form=form)
 
-
-@app.route('/shows/create', methods=['POST'])
-def create_show_submission():
-    # called to create new shows in the db, upon submitting new show listing form
-    # Done: insert form data as a new Show record in the db, instead
-    try:
-        show = Show(
-            artist_id=request.form.get('artist_id'),
-            venue_id=request.form.get('venue_id'),
-            start_time=request.form.get('start_time')
-        )
-        db.session.add(show)
-        db.session.commit()
-        flash('Show was successfully listed!')
-    except Exception as err:
-        db.session.rollback()
-        flash('Error adding Show! ' + str(err))
-    finally:
-        db.session.close()
-
-    # on successful db insert, flash success
-
-    # Done: on unsuccessful db insert, flash an error instead.
-    # e.g., flash('An error occurred. Show could not be listed.')
-    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
-    return render_template('pages/home.html')
-
-
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+# The commands invalidate the pages they change, which only reaches the web
+# workers through a shared RESPONSE_CACHE_BACKEND; with the in-process default
+# their cached pages stay stale until RESPONSE_CACHE_TTL.
+
+shows_cli = AppGroup('shows', help='Maintain show bookkeeping.')
+
+
+@shows_cli.command('rollover')
+def rollover_shows_command():
+    """Drop shows that have started from the upcoming show counters."""
+    released = rollover_shows()
+    db.session.commit()
+    cache.invalidate('venues')
+    click.echo(f'{released} shows rolled over.')
+
+
+@shows_cli.command('recount')
+def recount_shows_command():
+    """Recompute every upcoming show flag and counter from the Show table."""
+    recount_upcoming_shows()
+    db.session.commit()
+    cache.invalidate('venues')
+    click.echo('Upcoming show counters recomputed.')
+
+
+rollup_cli = AppGroup('rollup', help='Maintain the venue area rollup.')
+
+
+@rollup_cli.command('rebuild')
+def rebuild_rollup_command():
+    """Recompute the per-area venue and upcoming show counts from the Venue table."""
+    areas = rebuild_venue_areas()
+    db.session.commit()
+    cache.invalidate('venues')
+    click.echo(f'{areas} areas rebuilt.')
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORT_KINDS)))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Input format; defaults to the file extension.')
+@click.option('--batch-size', type=int, help='Rows per insert batch and commit.')
+@click.option('--rejects', type=click.File('w', encoding='utf-8'), help='Write rejected rows here as JSONL.')
+@with_appcontext
+def import_command(kind, source, fmt, batch_size, rejects):
+    """Bulk load venues, artists or shows from a CSV or JSONL file."""
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'jsonl')
+    importer = Importer(kind, batch_size or current_app.config['IMPORT_BATCH_SIZE'])
+    result = importer.run(read_records(source, fmt))
+    cache.invalidate('venues', 'artists', 'shows', *sorted(result.cache_tags))
+
+    for line, errors in result.rejected:
+        if rejects:
+            rejects.write(json.dumps({'line': line, 'errors': errors}) + '\n')
+        else:
+            click.echo(f'line {line}: {errors}', err=True)
+    click.echo(f'{result.imported} {kind} imported, {len(result.rejected)} rejected '
+               f'in {result.elapsed:.1f}s ({result.rate:.0f} rows/s).')
+
+
+@click.command('explain')
+@with_appcontext
+def explain_command():
+    """Print the plans of the hot listing/detail queries and check their indexes."""
+    missing = 0
+    for name, query, index in hot_queries():
+        plan = explain(query)
+        used = any(index in line for line in plan)
+        missing += not used
+        click.echo(f'== {name}: {"uses" if used else "DOES NOT USE"} {index}')
+        for line in plan:
+            click.echo('   ' + line)
+    db.session.rollback()
+    if missing:
+        raise SystemExit(1)
+
+
+@click.command('assets')
+@with_appcontext
+def assets_command():
+    """Bundle, fingerprint and precompress the layout's CSS and JS."""
+    for bundle, (name, sizes) in assets.build().items():
+        variants = ', '.join(f'{suffix or "raw"} {size / 1024:.1f} KiB' for suffix, size in sizes.items())
+        click.echo(f'{bundle} -> {name} ({variants})')
+    click.echo(f'Manifest written to {current_app.config["ASSETS_DIR"]}.')
+
+
+@click.command('startup-profile')
+@click.option('--runs', default=3, show_default=True, help='Cold starts to take the best of.')
+@click.option('--top', default=15, show_default=True, help='Slowest top-level imports to list.')
+@with_appcontext
+def startup_profile_command(runs, top):
+    """Time importing and creating the app in a fresh interpreter against STARTUP_BUDGET_MS."""
+    profile = profile_startup(current_app.root_path, runs)
+    total = profile.import_ms + profile.create_ms
+    budget = current_app.config['STARTUP_BUDGET_MS']
+    click.echo(f'import app    {profile.import_ms:8.1f} ms')
+    click.echo(f'create_app()  {profile.create_ms:8.1f} ms')
+    click.echo(f'total         {total:8.1f} ms   (budget {budget} ms)')
+    click.echo('slowest imports:')
+    for name, ms in sorted(profile.modules.items(), key=lambda item: -item[1])[:top]:
+        click.echo(f'  {ms:8.1f} ms  {name}')
+    if total > budget:
+        raise SystemExit(1)
 
 # ----------------------------------------------------------------------------#
 # Launch.
 # ----------------------------------------------------------------------------#
 
-# Default port:
+# Development server; debug mode follows FLASK_ENV/FLASK_DEBUG (see config.py).
+# In production run gunicorn with gunicorn.conf.py instead.
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
@@ -0,0 +1,160 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from markupsafe import Markup
+from sqlalchemy.orm import joinedload
+
+from editing import populate_edit_form, changed_values, apply_edit, StaleEdit
+from extensions import cache, autocomplete
+from forms import ArtistForm
+from models import db, Artist, Genre, artist_genres
+from queries import artist_shows_query
+from search import search_by_name
+from views import (partition_shows, next_show_start, genre_filter, selected_genres, render_listing, listing_rows,
+                   search_page)
+
+bp = Blueprint('artists', __name__, url_prefix='/artists')
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@bp.route('')
+@cache.cached('artists')
+@db.reads_from_replica
+def artists():
+    # Done: replace with real data returned from querying the database
+    data = Artist.query
+    genre = genre_filter()
+    if genre:
+        data = data.join(artist_genres).join(Genre).filter(Genre.name == genre)
+    data = listing_rows(data)
+    return render_listing('pages/artists.html', artists=data)
+
+
+@bp.route('/search', methods=['POST'])
+@db.reads_from_replica
+def search_artists():
+    # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
+    # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+    # search for "band" should return "The Wild Sax Band".
+    search_term = request.form.get('search_term', '')
+    limit, offset = search_page()
+    total, results = search_by_name(Artist, 'artist_fts', search_term, limit, offset)
+    response = {
+        "count": total,
+        "data": [{
+            "id": result.id,
+            "name": result.name,
+            "num_upcoming_shows": result.upcoming_shows_count
+        } for result in results]
+    }
+    return render_template('pages/search_artists.html', results=response,
+                           search_term=search_term, limit=limit, offset=offset)
+
+
+@bp.route('/<int:artist_id>')
+@cache.cached('artist:{artist_id}')
+@db.reads_from_replica
+def show_artist(artist_id):
+    # shows the artist page with the given artist_id
+    # Done: replace with real artist data from the artist table, using artist_id
+    header = db.session.query(Artist.name, Artist.version).filter(Artist.id == artist_id).first()
+    if header is None:
+        abort(404)
+
+    def profile():
+        artist = Artist.query.options(joinedload(Artist.genres)).get(artist_id).as_dict()
+        return render_template('fragments/artist_profile.html', artist=artist), (), None
+
+    def shows():
+        # Bookings of past shows leave the version alone, so the section also
+        # depends on the artist tag, which every show write invalidates.
+        shows = artist_shows_query(artist_id).all()
+        artist = {}
+        artist['past_shows'], artist['upcoming_shows'] = partition_shows(shows)
+        artist['past_shows_count'] = len(artist['past_shows'])
+        artist['upcoming_shows_count'] = len(artist['upcoming_shows'])
+        tags = {f'artist:{artist_id}'} | {f'venue:{show.venue_id}' for show in shows}
+        return render_template('fragments/artist_shows.html', artist=artist), tags, \
+            next_show_start(artist['upcoming_shows'])
+
+    return render_template('pages/show_artist.html', artist={'id': artist_id, 'name': header.name},
+                           profile=Markup(cache.fragment(f'artist:{artist_id}:{header.version}', profile)),
+                           shows=Markup(cache.fragment(f'artist:{artist_id}:{header.version}:shows', shows)))
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    form = ArtistForm()
+    artist = Artist.query.get_or_404(artist_id)
+    original = populate_edit_form(form, artist)
+    # Done: populate form with fields from artist with ID <artist_id>
+    return render_template('forms/edit_artist.html', form=form, artist=artist, original=original)
+
+
+@bp.route('/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # Done: take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+    form = ArtistForm()
+    try:
+        changes = changed_values(Artist, form, request.form.get('original'))
+        if changes:
+            apply_edit(Artist, artist_id, request.form.get('version', type=int), changes)
+            db.session.commit()
+            cache.invalidate('artists', f'artist:{artist_id}', 'shows')
+            if 'name' in changes:
+                autocomplete.add(Artist, artist_id, changes['name'])
+        flash('Artist updated successfully!')
+    except StaleEdit:
+        db.session.rollback()
+        flash('This artist was changed by someone else since you opened the form. '
+              'Check the current details below and make your edit again.')
+        return edit_artist(artist_id), 409
+    except Exception as err:
+        db.session.rollback()
+        flash('Error updating artist! ' + str(err))
+    finally:
+        db.session.close()
+
+    return redirect(url_for('.show_artist', artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@bp.route('/create', methods=['POST'])
+def create_artist_submission():
+    try:
+        artist = Artist(
+            name=request.form['name'],
+            city=request.form['city'],
+            genres=selected_genres(),
+            image_link=request.form['image_link'],
+            phone=request.form['phone'],
+            seeking_description=request.form['seeking_description'],
+            seeking_venue='seeking_venue' in request.form,
+            state=request.form['state'],
+            website=request.form['website_link'],
+            facebook_link=request.form['facebook_link']
+        )
+
+        db.session.add(artist)
+        db.session.commit()
+        cache.invalidate('artists')
+        flash('Artist ' + artist.name + ' was listed successfully!')
+        autocomplete.add(Artist, artist.id, artist.name)
+    except Exception as err:
+        flash('Error when adding new artist! ' + str(err))
+        db.session.rollback()
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz variants are written without it
+    brotli = None
+
+# Bundles of templates/layouts/main.html, in load order. Sources are paths
+# under static/; each bundle keeps the loading behaviour of its <script> or
+# <link> tag, so only files loaded the same way are grouped.
+BUNDLES = {
+    'main.css': ['css/bootstrap.min.css', 'css/layout.main.css', 'css/main.css',
+                 'css/main.responsive.css', 'css/main.quickfix.css'],
+    'head.js': ['js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'],
+    'script.js': ['js/script.js'],
+    'body.js': ['js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js'],
+}
+
+MANIFEST = 'manifest.json'
+
+# Precompressed variants, in order of preference.
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def fingerprinted_name(path, data):
+    stem, ext = posixpath.splitext(posixpath.basename(path))
+    return f'{stem}.{fingerprint(data)}{ext}'
+
+
+class AssetPipeline:
+    """Fingerprinted, precompressed bundles of the layout's CSS and JS.
+
+    ``flask assets`` writes the bundles, the files their CSS refers to and
+    a manifest into ``ASSETS_DIR``. Once a manifest exists, the
+    ``asset_urls`` template global points at the bundles, which are served
+    from ``/assets/`` with far-future immutable cache headers and in the
+    best precompressed encoding the client accepts. Without one, templates
+    get the individual source files, as before.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_DIR', os.path.join(app.static_folder, 'dist'))
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        self.app = app
+        self.directory = app.config['ASSETS_DIR']
+        self.manifest = self.load_manifest()
+        app.add_url_rule('/assets/<path:filename>', 'asset', self.serve)
+        app.add_template_global(self.asset_urls)
+        app.extensions['assets'] = self
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST)) as manifest:
+                return json.load(manifest)
+        except FileNotFoundError:
+            return {}
+
+    def asset_urls(self, bundle):
+        """URLs to load ``bundle`` from: the built file, or its sources."""
+        if bundle in self.manifest:
+            return [url_for('asset', filename=self.manifest[bundle])]
+        return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+    # Build.
+
+    def _write(self, name, data):
+        """Write ``name`` and its compressed variants; returns their sizes."""
+        sizes = {'': len(data)}
+        variants = [('', data), ('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, content in variants:
+            with open(os.path.join(self.directory, name + suffix), 'wb') as out:
+                out.write(content)
+            sizes[suffix] = len(content)
+        return sizes
+
+    def _rewrite_css_urls(self, source, css, built):
+        """Point the relative url()s of ``source`` at fingerprinted copies.
+
+        Files that do not exist are pointed back at their place in static/,
+        so bundling never changes what the browser ends up requesting.
+        """
+        static = self.app.static_folder
+
+        def replace(match):
+            url = match.group(2)
+            if re.match(r'^(data:|[a-z]+:|//|/|#)', url):
+                return match.group(0)
+            path, sep, suffix = re.match(r'([^?#]*)([?#]?)(.*)', url).groups()
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+            filename = os.path.join(static, target)
+            if not os.path.isfile(filename):
+                return f'url("{self.app.static_url_path}/{target}{sep}{suffix}")'
+            if target not in built:
+                with open(filename, 'rb') as f:
+                    data = f.read()
+                built[target] = fingerprinted_name(target, data)
+                self._write(built[target], data)
+            return f'url("{built[target]}{sep}{suffix}")'
+
+        return CSS_URL.sub(replace, css)
+
+    def build(self):
+        """Build every bundle; returns ``{bundle: (built name, sizes)}``."""
+        os.makedirs(self.directory, exist_ok=True)
+        manifest, report, built = {}, {}, {}
+        for bundle, sources in BUNDLES.items():
+            parts = []
+            for source in sources:
+                with open(os.path.join(self.app.static_folder, source), encoding='utf-8') as f:
+                    content = f.read()
+                if bundle.endswith('.css'):
+                    content = self._rewrite_css_urls(source, content, built)
+                parts.append(f'/* {source} */\n{content}')
+            # A statement ending without a semicolon must not run into the next file.
+            data = (';\n' if bundle.endswith('.js') else '\n').join(parts).encode('utf-8')
+            manifest[bundle] = fingerprinted_name(bundle, data)
+            report[bundle] = (manifest[bundle], self._write(manifest[bundle], data))
+        with open(os.path.join(self.directory, MANIFEST), 'w') as out:
+            json.dump(manifest, out, indent=2, sort_keys=True)
+        self.manifest = manifest
+        return report
+
+    # Serving.
+
+    def serve(self, filename):
+        if filename == MANIFEST or filename.endswith(('.gz', '.br')):
+            raise NotFound()
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if request.accept_encodings[encoding] and \
+                    os.path.isfile(os.path.join(self.directory, filename + suffix)):
+                response = send_from_directory(self.directory, filename + suffix, mimetype=mimetype,
+                                               max_age=self.app.config['ASSETS_MAX_AGE'])
+                response.content_encoding = encoding
+                break
+        else:
+            response = send_from_directory(self.directory, filename, mimetype=mimetype,
+                                           max_age=self.app.config['ASSETS_MAX_AGE'])
+        response.vary.add('Accept-Encoding')
+        response.cache_control.immutable = True
+        return response
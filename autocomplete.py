@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import abort, jsonify, request
+
+from models import db, Artist, Venue
+
+# Models behind /autocomplete/<kind>.
+KINDS = {'artists': Artist, 'venues': Venue}
+
+
+def fold(text):
+    return ' '.join(text.casefold().split())
+
+
+class PrefixIndex:
+    """The names of one model, searchable by the prefix of any of their words.
+
+    Every word of a name starts one ``(rest of the name, id)`` entry of a
+    sorted list, so the entries matching a prefix form one run that a
+    bisect finds; "hop" finds "The Musical Hop".
+    """
+
+    def __init__(self, rows=()):
+        self.names = {}
+        self.entries = []
+        for id_, name in rows:
+            self.names[id_] = name
+            self.entries.extend((key, id_) for key in self._keys(name))
+        self.entries.sort()
+
+    @staticmethod
+    def _keys(name):
+        words = fold(name).split(' ')
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    def add(self, id_, name):
+        self.remove(id_)
+        self.names[id_] = name
+        for key in self._keys(name):
+            insort(self.entries, (key, id_))
+
+    def remove(self, id_):
+        name = self.names.pop(id_, None)
+        if name is None:
+            return
+        for key in self._keys(name):
+            i = bisect_left(self.entries, (key, id_))
+            if i < len(self.entries) and self.entries[i] == (key, id_):
+                del self.entries[i]
+
+    def search(self, prefix, limit):
+        """Up to ``limit`` ``(id, name)`` pairs with a word starting with ``prefix``."""
+        prefix = fold(prefix)
+        if not prefix:
+            return []
+        found, seen = [], set()
+        for i in range(bisect_left(self.entries, (prefix,)), len(self.entries)):
+            key, id_ = self.entries[i]
+            if not key.startswith(prefix) or len(found) == limit:
+                break
+            if id_ not in seen:
+                seen.add(id_)
+                found.append((id_, self.names[id_]))
+        return found
+
+
+class Autocomplete:
+    """In-memory name indexes behind ``/autocomplete/artists`` and ``/autocomplete/venues``.
+
+    An index is loaded with one query the first time it is used, then kept
+    current by the create, edit and delete views of this process. Other
+    worker processes pick up those changes when their copy is older than
+    ``AUTOCOMPLETE_REFRESH_SECONDS``.
+    """
+
+    def __init__(self, app=None):
+        self.indexes = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUTOCOMPLETE_LIMIT', 10)
+        app.config.setdefault('AUTOCOMPLETE_MAX_LIMIT', 50)
+        app.config.setdefault('AUTOCOMPLETE_REFRESH_SECONDS', 300)
+        self.app = app
+        self.indexes = {}
+        app.add_url_rule('/autocomplete/<kind>', 'autocomplete', db.reads_from_replica(self.lookup))
+        app.extensions['autocomplete'] = self
+
+    def _index(self, model):
+        loaded = self.indexes.get(model)
+        if loaded is None or loaded[0] + self.app.config['AUTOCOMPLETE_REFRESH_SECONDS'] <= time.monotonic():
+            index = PrefixIndex(db.session.query(model.id, model.name).filter(model.name.isnot(None)))
+            with self._lock:
+                self.indexes[model] = loaded = (time.monotonic(), index)
+        return loaded[1]
+
+    def search(self, model, prefix, limit):
+        if not fold(prefix):
+            return []
+        index = self._index(model)
+        with self._lock:
+            return index.search(prefix, limit)
+
+    def add(self, model, id_, name):
+        """Index a created or renamed row; a no-op until the index is loaded."""
+        if model in self.indexes and name:
+            with self._lock:
+                self.indexes[model][1].add(id_, name)
+
+    def remove(self, model, id_):
+        if model in self.indexes:
+            with self._lock:
+                self.indexes[model][1].remove(id_)
+
+    def lookup(self, kind):
+        if kind not in KINDS:
+            abort(404)
+        config = self.app.config
+        limit = request.args.get('limit', config['AUTOCOMPLETE_LIMIT'], type=int)
+        limit = max(1, min(limit, config['AUTOCOMPLETE_MAX_LIMIT']))
+        matches = self.search(KINDS[kind], request.args.get('q', ''), limit)
+        return jsonify({'data': [{'id': id_, 'name': name} for id_, name in matches]})
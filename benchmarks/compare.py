@@ -0,0 +1,56 @@
+"""Diff two route benchmark reports.
+
+    python -m benchmarks.compare base.json new.json [--latency-ratio 1.25]
+
+Flags a route as a regression when it issues more SQL statements than in
+the base report, or its p50 latency grew by more than the given ratio.
+Exits with status 1 if any route regressed.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base, new, latency_ratio):
+    rows, regressions = [], []
+    for name, result in new['routes'].items():
+        before = base['routes'].get(name)
+        if before is None:
+            rows.append((name, None, result, 'new'))
+            continue
+        notes = []
+        if result['statements']['max'] > before['statements']['max']:
+            notes.append('more statements')
+        if result['latency_ms']['p50'] > before['latency_ms']['p50'] * latency_ratio:
+            notes.append('slower')
+        if notes:
+            regressions.append(name)
+        rows.append((name, before, result, ', '.join(notes)))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--latency-ratio', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as base, open(args.new) as new:
+        rows, regressions = compare(json.load(base), json.load(new), args.latency_ratio)
+
+    print(f'{"route":<20} {"p50 ms":>19} {"statements":>13}')
+    for name, before, after, note in rows:
+        if before is None:
+            print(f'{name:<20} {"-":>8} -> {after["latency_ms"]["p50"]:>8.2f} '
+                  f'{"-":>4} -> {after["statements"]["max"]:>4}  {note}')
+        else:
+            print(f'{name:<20} {before["latency_ms"]["p50"]:>8.2f} -> {after["latency_ms"]["p50"]:>8.2f} '
+                  f'{before["statements"]["max"]:>4} -> {after["statements"]["max"]:>4}  {note}')
+    if regressions:
+        print(f'{len(regressions)} regressed: ' + ', '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Reproducible synthetic dataset for benchmarks.
+
+    python -m benchmarks.dataset --database-uri sqlite:///bench.db \
+        --venues 2000 --artists 5000 --shows 50000 --cities 100 --seed 1
+
+The same arguments always produce the same rows; shows are spread over a
+year either side of today's midnight, without double-booking any venue.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+ADJECTIVES = ['Musical', 'Dueling', 'Electric', 'Velvet', 'Golden', 'Wild', 'Silent', 'Neon', 'Blue',
+              'Rusty', 'Midnight', 'Crimson', 'Hollow', 'Lucky', 'Broken', 'Royal']
+NOUNS = ['Hop', 'Pianos', 'Petals', 'Sax', 'Lounge', 'Garage', 'Cellar', 'Hall', 'Tavern', 'Owls',
+         'Rebels', 'Engines', 'Satellites', 'Orchard', 'Harbor', 'Foxes']
+STATES = ['CA', 'NY', 'TX', 'WA', 'IL', 'FL', 'GA', 'CO', 'OR', 'MA', 'TN', 'LA', 'NV', 'AZ', 'MN', 'PA']
+
+CHUNK = 5000
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK):
+        yield rows[i:i + CHUNK]
+
+
+def _name(rng, kind):
+    return f'The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {kind} {rng.randrange(10000)}'
+
+
+def generate(venues, artists, shows, cities, seed=1, now=None):
+    """Insert the dataset through the current app's session and commit it.
+
+    Expects an empty, migrated database.
+    """
+    from counters import recount_upcoming_shows
+    from models import db, Venue, Artist, Show, Genre, venue_genres, artist_genres, SHOW_DEFAULT_MINUTES
+
+    rng = random.Random(seed)
+    now = now or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    areas = [(f'City {i}', STATES[i % len(STATES)]) for i in range(cities)]
+    genre_ids = [id_ for id_, in db.session.query(Genre.id).order_by(Genre.id)]
+
+    def owners(model, count, kind, extra):
+        rows, links = [], []
+        for id_ in range(1, count + 1):
+            city, state = rng.choice(areas)
+            rows.append(dict(id=id_, name=_name(rng, kind), city=city, state=state,
+                             phone='5551234567', image_link=f'https://img.example/{kind.lower()}/{id_}.jpg',
+                             facebook_link=f'https://facebook.com/{kind.lower()}{id_}',
+                             website=f'https://{kind.lower()}{id_}.example', seeking_description='',
+                             upcoming_shows_count=0, **extra))
+            links.extend((genre_id, id_) for genre_id in rng.sample(genre_ids, rng.randint(1, 3)))
+        for chunk in _chunks(rows):
+            db.session.execute(model.__table__.insert(), chunk)
+        if db.engine.dialect.name == 'postgresql':
+            # Explicit ids bypass the sequence; move it past them.
+            db.session.execute(db.text(f'SELECT setval(\'"{model.__tablename__}_id_seq"\', {count})'))
+        return links
+
+    venue_links = owners(Venue, venues, 'Venue', {'address': '1 Main St', 'seeking_talent': False})
+    artist_links = owners(Artist, artists, 'Band', {'seeking_venue': False})
+    for table, key, links in ((venue_genres, 'venue_id', venue_links), (artist_genres, 'artist_id', artist_links)):
+        for chunk in _chunks([{'genre_id': g, key: o} for g, o in links]):
+            db.session.execute(table.insert(), chunk)
+
+    # Shows last SHOW_DEFAULT_MINUTES and start on distinct slots of that
+    # length, so no venue is double-booked.
+    slot = timedelta(minutes=SHOW_DEFAULT_MINUTES)
+    slots_per_year = timedelta(days=365) // slot
+    booked = set()
+    show_rows = []
+    while len(show_rows) < shows:
+        venue_id, start = rng.randint(1, venues), rng.randint(-slots_per_year, slots_per_year)
+        if (venue_id, start) in booked:
+            continue
+        booked.add((venue_id, start))
+        show_rows.append(dict(venue_id=venue_id, artist_id=rng.randint(1, artists), start_time=now + start * slot,
+                              end_time=now + (start + 1) * slot, upcoming=False))
+    for chunk in _chunks(show_rows):
+        db.session.execute(Show.__table__.insert(), chunk)
+
+    recount_upcoming_shows()
+    db.session.commit()
+
+
+def prepare_database(app, reset=True):
+    """Migrate the database of ``app``, from scratch when ``reset``."""
+    import flask_migrate
+
+    with app.app_context():
+        if reset:
+            flask_migrate.downgrade(revision='base')
+        flask_migrate.upgrade()
+
+
+def add_arguments(parser):
+    parser.add_argument('--database-uri', default='sqlite:///bench.db')
+    parser.add_argument('--venues', type=int, default=500)
+    parser.add_argument('--artists', type=int, default=1000)
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    app = create_app(SQLALCHEMY_DATABASE_URI=args.database_uri)
+    prepare_database(app)
+    with app.app_context():
+        generate(args.venues, args.artists, args.shows, args.cities, args.seed)
+    print(f'Seeded {args.venues} venues, {args.artists} artists and {args.shows} shows '
+          f'across {args.cities} cities into {args.database_uri}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""Route benchmark suite.
+
+    python -m benchmarks.routes --database-uri sqlite:///bench.db --out report.json
+
+Seeds a synthetic dataset (see benchmarks.dataset), drives every route of
+app.py through the Flask test client and records latency percentiles and
+SQL statement counts per route. Compare two reports with
+``python -m benchmarks.compare``.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from benchmarks.dataset import add_arguments, generate, prepare_database
+
+
+def _venue_form(rng):
+    return {'name': f'Bench Venue {rng.randrange(10 ** 6)}', 'city': 'City 1', 'state': 'NY',
+            'address': '2 Side St', 'phone': '5550000000', 'genres': ['Jazz', 'Soul'],
+            'facebook_link': 'https://facebook.com/bench', 'image_link': '', 'website_link': '',
+            'seeking_description': ''}
+
+
+def _artist_form(rng):
+    return {'name': f'Bench Band {rng.randrange(10 ** 6)}', 'city': 'City 1', 'state': 'NY',
+            'phone': '5550000000', 'genres': ['Rock n Roll'], 'facebook_link': 'https://facebook.com/bench',
+            'image_link': '', 'website_link': '', 'seeking_description': ''}
+
+
+def _version(model, id_):
+    # Edits must carry the row's current version or they are refused as stale.
+    from models import db
+    return db.session.query(model.version).filter(model.id == id_).scalar()
+
+
+def _edit(model, path, id_, form):
+    return f'{path}/{id_}/edit', dict(form, version=_version(model, id_))
+
+
+def scenarios(args):
+    """``(name, rule, method, request factory)`` for every benchmarked request.
+
+    A factory takes the RNG and returns ``(url, form data)``; it runs in an
+    app context, outside the measured request.
+    """
+    from models import Venue, Artist
+
+    venue = lambda rng: rng.randint(1, args.venues)
+    artist = lambda rng: rng.randint(1, args.artists)
+    # Deletes walk down from the highest generated venue so each request removes a different one.
+    doomed = iter(range(args.venues, 0, -1))
+    start_time = lambda rng: (datetime.now() + timedelta(days=rng.randint(1, 90))).strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        ('index', '/', 'GET', lambda rng: ('/', None)),
+        ('venues', '/venues', 'GET', lambda rng: ('/venues', None)),
+        ('venues by genre', '/venues', 'GET', lambda rng: ('/venues?genre=Jazz', None)),
+        ('venues of an area', '/venues', 'GET', lambda rng: ('/venues?city=City+0&state=CA', None)),
+        ('search venues', '/venues/search', 'POST', lambda rng: ('/venues/search', {'search_term': 'hop'})),
+        ('show venue', '/venues/<int:venue_id>', 'GET', lambda rng: (f'/venues/{venue(rng)}', None)),
+        ('create venue form', '/venues/create', 'GET', lambda rng: ('/venues/create', None)),
+        ('create venue', '/venues/create', 'POST', lambda rng: ('/venues/create', _venue_form(rng))),
+        ('edit venue form', '/venues/<int:venue_id>/edit', 'GET',
+         lambda rng: (f'/venues/{venue(rng)}/edit', None)),
+        ('edit venue', '/venues/<int:venue_id>/edit', 'POST',
+         lambda rng: _edit(Venue, '/venues', venue(rng), _venue_form(rng))),
+        ('artists', '/artists', 'GET', lambda rng: ('/artists', None)),
+        ('artists by genre', '/artists', 'GET', lambda rng: ('/artists?genre=Jazz', None)),
+        ('search artists', '/artists/search', 'POST', lambda rng: ('/artists/search', {'search_term': 'band'})),
+        ('show artist', '/artists/<int:artist_id>', 'GET', lambda rng: (f'/artists/{artist(rng)}', None)),
+        ('create artist form', '/artists/create', 'GET', lambda rng: ('/artists/create', None)),
+        ('create artist', '/artists/create', 'POST', lambda rng: ('/artists/create', _artist_form(rng))),
+        ('edit artist form', '/artists/<int:artist_id>/edit', 'GET',
+         lambda rng: (f'/artists/{artist(rng)}/edit', None)),
+        ('edit artist', '/artists/<int:artist_id>/edit', 'POST',
+         lambda rng: _edit(Artist, '/artists', artist(rng), _artist_form(rng))),
+        ('shows', '/shows', 'GET', lambda rng: ('/shows', None)),
+        ('shows incl. past', '/shows', 'GET', lambda rng: ('/shows?include_past=1', None)),
+        ('shows in window', '/shows', 'GET',
+         lambda rng: (f'/shows?from={date.today() + timedelta(days=7)}&to={date.today() + timedelta(days=37)}',
+                      None)),
+        ('shows calendar', '/shows.ics', 'GET', lambda rng: ('/shows.ics', None)),
+        ('venue calendar', '/venues/<int:venue_id>/shows.ics', 'GET',
+         lambda rng: (f'/venues/{venue(rng)}/shows.ics', None)),
+        ('artist calendar', '/artists/<int:artist_id>/shows.ics', 'GET',
+         lambda rng: (f'/artists/{artist(rng)}/shows.ics', None)),
+        ('create show form', '/shows/create', 'GET', lambda rng: ('/shows/create', None)),
+        ('create show', '/shows/create', 'POST',
+         lambda rng: ('/shows/create', {'artist_id': artist(rng), 'venue_id': venue(rng),
+                                        'start_time': start_time(rng)})),
+        ('autocomplete venues', '/autocomplete/<kind>', 'GET', lambda rng: ('/autocomplete/venues?q=ho', None)),
+        ('autocomplete artists', '/autocomplete/<kind>', 'GET', lambda rng: ('/autocomplete/artists?q=ba', None)),
+        ('api venues', '/api/v1/venues', 'GET', lambda rng: ('/api/v1/venues', None)),
+        ('api search venues', '/api/v1/venues/search', 'GET', lambda rng: ('/api/v1/venues/search?q=hop', None)),
+        ('api venue', '/api/v1/venues/<int:venue_id>', 'GET', lambda rng: (f'/api/v1/venues/{venue(rng)}', None)),
+        ('api artists', '/api/v1/artists', 'GET', lambda rng: ('/api/v1/artists', None)),
+        ('api search artists', '/api/v1/artists/search', 'GET',
+         lambda rng: ('/api/v1/artists/search?q=band', None)),
+        ('api artist', '/api/v1/artists/<int:artist_id>', 'GET',
+         lambda rng: (f'/api/v1/artists/{artist(rng)}', None)),
+        ('api shows', '/api/v1/shows', 'GET', lambda rng: ('/api/v1/shows', None)),
+        ('api show', '/api/v1/shows/<int:show_id>', 'GET',
+         lambda rng: (f'/api/v1/shows/{rng.randint(1, args.shows)}', None)),
+        ('api schedule shows', '/api/v1/shows/batch', 'POST',
+         lambda rng: ('/api/v1/shows/batch', {'shows': [
+             {'artist_id': artist(rng), 'venue_id': venue(rng), 'start_time': start_time(rng), 'duration': 90}
+             for _ in range(10)]})),
+        ('cache stats', '/cache/stats', 'GET', lambda rng: ('/cache/stats', None)),
+        ('db stats', '/db/stats', 'GET', lambda rng: ('/db/stats', None)),
+        ('health check', '/healthz', 'GET', lambda rng: ('/healthz', None)),
+        ('delete venue', '/venues/<venue_id>/delete', 'POST',
+         lambda rng: (f'/venues/{next(doomed)}/delete', None)),
+    ]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def run(app, args):
+    from models import db
+
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a, **kw: statements.__setitem__(0, statements[0] + 1))
+
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    results = {}
+    covered = set()
+    for name, rule, method, factory in scenarios(args):
+        covered.add((rule, method))
+        latencies, counts, statuses = [], [], {}
+        for i in range(args.warmup + args.requests):
+            with app.app_context():
+                url, data = factory(rng)
+            statements[0] = 0
+            started = time.perf_counter()
+            if url.startswith('/api/') and data is not None:
+                response = client.open(url, method=method, json=data)
+            else:
+                response = client.open(url, method=method, data=data)
+            # Streamed bodies are generated as they are read.
+            response.get_data()
+            response.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            if i < args.warmup:
+                continue
+            latencies.append(elapsed)
+            counts.append(statements[0])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        latencies.sort()
+        results[name] = {
+            'method': method,
+            'rule': rule,
+            'requests': len(latencies),
+            'status': {str(code): n for code, n in sorted(statuses.items())},
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 3),
+                'p90': round(percentile(latencies, 90), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'max': round(latencies[-1], 3),
+                'mean': round(statistics.fmean(latencies), 3),
+            },
+            'statements': {'mean': round(statistics.fmean(counts), 2), 'max': max(counts)},
+        }
+        print(f'{name:<20} p50 {results[name]["latency_ms"]["p50"]:>9.2f} ms   '
+              f'p99 {results[name]["latency_ms"]["p99"]:>9.2f} ms   '
+              f'{results[name]["statements"]["max"]:>4} statements', file=sys.stderr)
+
+    uncovered = sorted(f'{method} {rule.rule}' for rule in app.url_map.iter_rules()
+                       for method in rule.methods - {'HEAD', 'OPTIONS'}
+                       if rule.endpoint != 'static' and (rule.rule, method) not in covered)
+    return results, uncovered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=50, help='Measured requests per route.')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per route.')
+    parser.add_argument('--reuse', action='store_true', help='Benchmark the existing data instead of reseeding.')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled.')
+    parser.add_argument('--out', default='bench_report.json')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    app = create_app(SQLALCHEMY_DATABASE_URI=args.database_uri, WTF_CSRF_ENABLED=False,
+                     RESPONSE_CACHE_ENABLED=args.cache, FRAGMENT_CACHE_ENABLED=args.cache)
+    prepare_database(app, reset=not args.reuse)
+    if not args.reuse:
+        with app.app_context():
+            generate(args.venues, args.artists, args.shows, args.cities, args.seed)
+
+    results, uncovered = run(app, args)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': args.database_uri.split(':', 1)[0],
+            'dataset': {'venues': args.venues, 'artists': args.artists, 'shows': args.shows,
+                        'cities': args.cities, 'seed': args.seed},
+            'requests': args.requests,
+            'cache': args.cache,
+            'uncovered_routes': uncovered,
+        },
+        'routes': results,
+    }
+    with open(args.out, 'w') as out:
+        json.dump(report, out, indent=2, sort_keys=True)
+    if uncovered:
+        print('Routes without a scenario: ' + ', '.join(uncovered), file=sys.stderr)
+    print(f'Report written to {args.out}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, session
+from werkzeug.utils import import_string
+
+from database import pinned_to_primary
+
+
+class CacheBackend:
+    """Interface a response cache store has to implement.
+
+    Values are opaque picklable objects; ``timeout`` is in seconds and
+    ``None`` means the backend default.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """In-process store bounded by entry count, with a per-entry TTL."""
+
+    def __init__(self, maxsize=512, default_timeout=300):
+        self.maxsize = maxsize
+        self.default_timeout = default_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def lru_backend(app):
+    return LRUCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+
+
+class ResponseCache:
+    """Caches rendered GET pages keyed by path and query string.
+
+    Every entry records the tags it depends on (``'venues'``, ``'venue:3'``...)
+    together with the tag tokens current when it was stored. Writes call
+    :meth:`invalidate` with the tags they touch, which replaces those tokens,
+    so exactly the dependent pages miss on their next read. Tags only known
+    while rendering can be attached with :meth:`tag`.
+
+    Parts of a page can be cached on their own with :meth:`fragment`, in
+    the same backend, so a page that misses can still be assembled from
+    fragments that are still valid.
+
+    With a read replica, what was read from it in the
+    ``REPLICA_STICKY_SECONDS`` after a write is not stored, as it may not
+    include that write yet, and clients pinned to the primary after a write
+    skip cached entries so they see their own edits.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.enabled = self.fragments_enabled = False
+        self.hits = self.misses = self.invalidations = 0
+        self.fragment_hits = self.fragment_misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', 'cache.lru_backend')
+        app.config.setdefault('RESPONSE_CACHE_SIZE', 512)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.fragments_enabled = app.config['FRAGMENT_CACHE_ENABLED']
+        self.default_timeout = app.config['RESPONSE_CACHE_TTL']
+        self.backend = import_string(app.config['RESPONSE_CACHE_BACKEND'])(app)
+        app.extensions['response_cache'] = self
+
+    def _tag_tokens(self, tags):
+        return {tag: self.backend.get('tag:' + tag) for tag in tags}
+
+    def _generation(self):
+        # Replaced by every invalidation. Tags found while rendering are only
+        # known afterwards, so whatever was rendered while this changed may
+        # predate an invalidation of one of them and is not stored.
+        return self.backend.get('tag:*')
+
+    def _replica_may_lag(self):
+        if not g.get('replica_read'):
+            return False
+        written_at = self.backend.get('written_at') or 0
+        return time.time() - written_at < current_app.config['REPLICA_STICKY_SECONDS']
+
+    def _storable(self, generation):
+        return self._generation() == generation and not self._replica_may_lag()
+
+    def tag(self, *tags):
+        """Make the page being rendered depend on ``tags`` as well."""
+        g.setdefault('cache_tags', set()).update(tags)
+
+    def expire_at(self, timestamp):
+        """Make the page being rendered expire by ``timestamp`` (``time.time()`` based)."""
+        g.cache_expires_at = min(g.get('cache_expires_at', timestamp), timestamp)
+
+    def _timeout(self, expires_at):
+        if expires_at is None:
+            return None
+        return max(1, math.ceil(expires_at - time.time()))
+
+    def fragment(self, key, render):
+        """The markup of one part of a page, cached under ``key``.
+
+        ``render()`` returns ``(markup, tags, expires_at)``. The entry is
+        dropped once one of ``tags`` is invalidated or at ``expires_at`` (a
+        ``time.time()`` timestamp, or ``None`` for the backend default), and
+        the page being rendered inherits both, so a cached page never
+        outlives its fragments. Keys should carry the version of what they
+        render, so edits need no invalidation. With fragments disabled the
+        page still inherits them.
+        """
+        key = 'fragment:' + key
+        if self.fragments_enabled and not pinned_to_primary():
+            entry = self.backend.get(key)
+            if entry is not None:
+                markup, tokens, expires_at = entry
+                if self._tag_tokens(tokens) == tokens:
+                    self.fragment_hits += 1
+                    self.tag(*tokens)
+                    if expires_at is not None:
+                        self.expire_at(expires_at)
+                    return markup
+            self.fragment_misses += 1
+
+        generation = self._generation()
+        markup, tags, expires_at = render()
+        self.tag(*tags)
+        if expires_at is not None:
+            self.expire_at(expires_at)
+        if self.fragments_enabled:
+            tokens = self._tag_tokens(tags)
+            if self._storable(generation):
+                self.backend.set(key, (markup, tokens, expires_at), self._timeout(expires_at))
+        return markup
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set('tag:' + tag, uuid.uuid4().hex, 0)
+        self.backend.set('tag:*', uuid.uuid4().hex, 0)
+        self.backend.set('written_at', time.time(), 0)
+        self.invalidations += len(tags)
+
+    def cached(self, *tags):
+        """Cache a view's rendered output.
+
+        ``tags`` are formatted with the view arguments, so
+        ``'venue:{venue_id}'`` yields one tag per venue.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                # Pending flash messages are rendered into the page and must not be shared.
+                if not self.enabled or request.method != 'GET' or session.get('_flashes'):
+                    return view(**kwargs)
+
+                key = 'view:' + request.full_path
+                entry = None if pinned_to_primary() else self.backend.get(key)
+                if entry is not None:
+                    body, tokens = entry
+                    if self._tag_tokens(tokens) == tokens:
+                        self.hits += 1
+                        return body
+                self.misses += 1
+
+                page_tags = {tag.format(**kwargs) for tag in tags}
+                g.cache_tags = set(page_tags)
+                g.pop('cache_expires_at', None)
+                tokens = self._tag_tokens(page_tags)
+                generation = self._generation()
+                body = view(**kwargs)
+                if isinstance(body, str) and not session.get('_flashes') and self._storable(generation):
+                    tokens.update(self._tag_tokens(g.cache_tags - page_tags))
+                    timeout = self._timeout(g.get('cache_expires_at'))
+                    if timeout is not None and timeout >= self.default_timeout:
+                        timeout = None
+                    self.backend.set(key, (body, tokens), timeout)
+                return body
+            return wrapper
+        return decorator
+
+    def stats(self):
+        stats = {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'fragment_hits': self.fragment_hits,
+            'fragment_misses': self.fragment_misses,
+        }
+        if hasattr(self.backend, '__len__'):
+            stats['entries'] = len(self.backend)
+        return stats
@@ -0,0 +1,94 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from models import db, Show, Venue, Artist, VenueArea
+
+
+def adjust_counters(model, deltas):
+    """Add ``deltas[id]`` to the upcoming_shows_count of each ``model`` row, one UPDATE per distinct delta.
+
+    ``version`` is left alone: it guards edit forms against concurrent
+    edits, and a booking is not one.
+    """
+    ids_by_delta = defaultdict(list)
+    for id_, delta in deltas.items():
+        ids_by_delta[delta].append(id_)
+    for delta, ids in ids_by_delta.items():
+        db.session.query(model).filter(model.id.in_(ids)).update(
+            {model.upcoming_shows_count: model.upcoming_shows_count + delta},
+            synchronize_session=False
+        )
+
+
+def book_show(show, now=None):
+    """Count a new ``show`` towards its venue and artist if it has not started yet.
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the show itself.
+    """
+    if show.start_time > (now or datetime.now()):
+        show.upcoming = True
+        adjust_counters(Venue, {show.venue_id: 1})
+        adjust_counters(Artist, {show.artist_id: 1})
+
+
+def book_shows(shows, now=None):
+    """:func:`book_show` for many shows, with one UPDATE per distinct count."""
+    now = now or datetime.now()
+    upcoming = [show for show in shows if show.start_time > now]
+    for show in upcoming:
+        show.upcoming = True
+    adjust_counters(Venue, Counter(show.venue_id for show in upcoming))
+    adjust_counters(Artist, Counter(show.artist_id for show in upcoming))
+
+
+def release_shows(*criteria):
+    """Stop counting the upcoming shows matching ``criteria``.
+
+    Used both when shows are deleted and when they age past their start
+    time. Returns the number of shows released.
+    """
+    shows = db.session.query(Show.venue_id, Show.artist_id) \
+        .filter(Show.upcoming.is_(True), *criteria) \
+        .all()
+    if not shows:
+        return 0
+    adjust_counters(Venue, {id_: -n for id_, n in Counter(s.venue_id for s in shows).items()})
+    adjust_counters(Artist, {id_: -n for id_, n in Counter(s.artist_id for s in shows).items()})
+    db.session.query(Show).filter(Show.upcoming.is_(True), *criteria).update(
+        {Show.upcoming: False}, synchronize_session=False
+    )
+    return len(shows)
+
+
+def rollover_shows(now=None):
+    """Release every counted show whose start time has passed."""
+    return release_shows(Show.start_time <= (now or datetime.now()))
+
+
+def recount_upcoming_shows(now=None):
+    """Recompute every upcoming flag and counter from the Show table."""
+    now = now or datetime.now()
+    db.session.query(Show).update({Show.upcoming: Show.start_time > now}, synchronize_session=False)
+    for model, fk in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        count = db.session.query(db.func.count(Show.id)) \
+            .filter(fk == model.id, Show.upcoming.is_(True)) \
+            .scalar_subquery()
+        db.session.query(model).filter(model.upcoming_shows_count != count).update(
+            {model.upcoming_shows_count: count}, synchronize_session=False
+        )
+
+
+def rebuild_venue_areas():
+    """Recompute the VenueArea rollup from the Venue table; returns the number of areas."""
+    if db.engine.dialect.name == 'postgresql':
+        # Concurrent venue writes wait in their triggers until this commits,
+        # so none of their deltas lands on the rows being replaced.
+        db.session.execute(db.text('LOCK TABLE "VenueArea" IN EXCLUSIVE MODE'))
+    db.session.query(VenueArea).delete(synchronize_session=False)
+    city, state = db.func.coalesce(Venue.city, ''), db.func.coalesce(Venue.state, '')
+    areas = db.session.query(city, state, db.func.count(Venue.id), db.func.sum(Venue.upcoming_shows_count)) \
+        .group_by(city, state)
+    db.session.execute(VenueArea.__table__.insert().from_select(
+        ['city', 'state', 'venue_count', 'upcoming_shows_count'], areas.statement))
+    return db.session.query(VenueArea).count()
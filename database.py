@@ -0,0 +1,186 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND = 'replica'
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.checkout_wait_total += waited
+                self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+    def stats(self):
+        with self._wait_lock:
+            checkouts, total, worst = self.checkouts, self.checkout_wait_total, self.checkout_wait_max
+        return {
+            'size': self.size(),
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'checkouts': checkouts,
+            'checkout_wait_ms': {
+                'mean': round(total / checkouts * 1000, 3) if checkouts else 0.0,
+                'max': round(worst * 1000, 3),
+                'total': round(total * 1000, 3),
+            },
+        }
+
+
+def pinned_to_primary():
+    """Whether the client of this request wrote in the last ``REPLICA_STICKY_SECONDS``."""
+    return has_request_context() and session.get('db_primary_until', 0) > time.time()
+
+
+def _use_replica(app):
+    if not has_request_context() or not g.get('read_replica'):
+        return False
+    if REPLICA_BIND not in (app.config['SQLALCHEMY_BINDS'] or {}):
+        return False
+    # Read-your-writes: a client that just wrote keeps reading the primary
+    # until the replica has had time to catch up.
+    return not pinned_to_primary()
+
+
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so the ON DELETE CASCADE of the genre
+    # link tables, unless every connection turns them on.
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+class RoutingSession(SignallingSession):
+    """Session that sends the reads of replica views to the replica bind.
+
+    Flushes always go to the primary, so anything a view writes stays
+    consistent with what it reads in the same transaction.
+    """
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self._flushing and _use_replica(self.app):
+            # Lets the response cache tell pages that may lag behind a write.
+            g.replica_read = True
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+def _pin_to_primary(db_session):
+    if has_request_context():
+        session['db_primary_until'] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy with pool metrics and optional read-replica routing.
+
+    Views decorated with :meth:`reads_from_replica` run their queries on the
+    ``replica`` bind when ``SQLALCHEMY_BINDS`` has one; everything else uses
+    the primary. Server pools are :class:`TimedQueuePool` so checkout waits
+    show up in :meth:`pool_stats`. SQLite connections enforce foreign keys.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        app.config.setdefault('DB_POOL_SIZE', 5)
+        app.config.setdefault('DB_MAX_OVERFLOW', 10)
+        app.config.setdefault('DB_POOL_TIMEOUT', 30)
+        app.config.setdefault('DB_POOL_RECYCLE', 1800)
+        app.config.setdefault('DB_POOL_PRE_PING', True)
+        app.config.setdefault('DB_STATEMENT_TIMEOUT_MS', 0)
+        app.config.setdefault('DB_RESERVED_CONNECTIONS', 10)
+        super().init_app(app)
+
+    def create_session(self, options):
+        # Commits happen in write views only, including UPDATEs that never flush.
+        if not event.contains(RoutingSession, 'after_commit', _pin_to_primary):
+            event.listen(RoutingSession, 'after_commit', _pin_to_primary)
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        engine = super().create_engine(sa_url, engine_opts)
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _enforce_foreign_keys)
+        return engine
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super().apply_driver_hacks(app, sa_url, options)
+        backend = sa_url.drivername.split('+')[0]
+        if backend == 'sqlite':
+            return sa_url, options
+        # Decided per engine rather than in config.py, since the URI can be
+        # swapped after the config is loaded (benchmarks, SQLite dev setups).
+        config = app.config
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pool_pre_ping=config['DB_POOL_PRE_PING'],
+        )
+        if backend == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+            options['connect_args'] = {'options': f'-c statement_timeout={config["DB_STATEMENT_TIMEOUT_MS"]}'}
+        return sa_url, options
+
+    @staticmethod
+    def reads_from_replica(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.read_replica = True
+            return view(*args, **kwargs)
+        return wrapper
+
+    def connection_budget(self, processes, app=None):
+        """``(bind, needed, available)`` of each database when ``processes`` copies of the app run.
+
+        ``needed`` assumes every pool grows to its overflow limit;
+        ``available`` is the server's ``max_connections`` less
+        ``DB_RESERVED_CONNECTIONS``, or ``None`` for SQLite, which has no limit.
+        """
+        app = self.get_app(app)
+        config = app.config
+        per_process = config['DB_POOL_SIZE'] + config['DB_MAX_OVERFLOW']
+        budget = []
+        for bind in [None] + [key for key in (config['SQLALCHEMY_BINDS'] or {})]:
+            engine = self.get_engine(app, bind=bind)
+            available = None
+            if engine.dialect.name != 'sqlite':
+                with engine.connect() as conn:
+                    limit = int(conn.exec_driver_sql('SHOW max_connections').scalar())
+                available = limit - config['DB_RESERVED_CONNECTIONS']
+            budget.append((bind or 'primary', processes * per_process, available))
+        return budget
+
+    def pool_stats(self, app=None):
+        app = self.get_app(app)
+        binds = [None] + [key for key in (app.config['SQLALCHEMY_BINDS'] or {})]
+        stats = {}
+        for bind in binds:
+            pool = self.get_engine(app, bind=bind).pool
+            stats[bind or 'primary'] = pool.stats() if isinstance(pool, TimedQueuePool) \
+                else {'pool': type(pool).__name__, 'status': pool.status()}
+        return stats
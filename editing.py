@@ -0,0 +1,85 @@
+import json
+
+from models import db, Artist, Venue, Genre, artist_genres, venue_genres
+
+# Column edited by each field of the entity's edit form.
+EDIT_FIELDS = {
+    Artist: {
+        'name': 'name', 'city': 'city', 'state': 'state', 'phone': 'phone', 'genres': 'genres',
+        'website': 'website_link', 'facebook_link': 'facebook_link', 'image_link': 'image_link',
+        'seeking_venue': 'seeking_venue', 'seeking_description': 'seeking_description',
+    },
+    Venue: {
+        'name': 'name', 'city': 'city', 'state': 'state', 'address': 'address', 'phone': 'phone',
+        'genres': 'genres', 'website': 'website_link', 'facebook_link': 'facebook_link',
+        'image_link': 'image_link', 'seeking_talent': 'seeking_talent',
+        'seeking_description': 'seeking_description',
+    },
+}
+
+GENRE_LINKS = {
+    Artist: (artist_genres, 'artist_id'),
+    Venue: (venue_genres, 'venue_id'),
+}
+
+
+class StaleEdit(Exception):
+    """The row was changed or deleted since its edit form was rendered."""
+
+
+def populate_edit_form(form, obj):
+    """Fill ``form`` from ``obj``; returns the JSON of the values shown, for the form's ``original`` field."""
+    original = {}
+    for column, field in EDIT_FIELDS[type(obj)].items():
+        value = getattr(obj, column)
+        if column == 'genres':
+            value = [genre.name for genre in value]
+        form[field].process_data(value)
+        original[column] = value
+    return json.dumps(original)
+
+
+def _same(a, b):
+    # Empty strings, NULLs, unchecked boxes and no genres all read the same on the form.
+    return (a or None) == (b or None)
+
+
+def changed_values(model, form, original):
+    """Columns whose submitted value differs from the one the form was rendered with."""
+    try:
+        original = json.loads(original or '{}')
+    except ValueError:
+        original = {}
+    changes = {}
+    for column, field in EDIT_FIELDS[model].items():
+        value = form[field].data
+        if column not in original or not _same(value, original[column]):
+            changes[column] = value
+    return changes
+
+
+def apply_edit(model, id_, version, changes):
+    """Write ``changes`` to row ``id_`` if it is still at ``version``.
+
+    One ``UPDATE ... WHERE id = :id AND version = :version`` carries the
+    changed columns and bumps the version, without loading the row; a
+    genre change adds a DELETE and an INSERT ... SELECT of the links.
+    Raises :class:`StaleEdit` if the row moved on, so concurrent edits of
+    the same row cannot overwrite each other.
+    """
+    values = {getattr(model, column): value for column, value in changes.items() if column != 'genres'}
+    values[model.version] = model.version + 1
+    updated = db.session.query(model) \
+        .filter(model.id == id_, model.version == version) \
+        .update(values, synchronize_session=False)
+    if not updated:
+        raise StaleEdit()
+
+    if 'genres' in changes:
+        table, key = GENRE_LINKS[model]
+        db.session.execute(table.delete().where(table.c[key] == id_))
+        if changes['genres']:
+            db.session.execute(table.insert().from_select(
+                ['genre_id', key],
+                db.select(Genre.id, db.literal(id_)).where(Genre.name.in_(changes['genres']))
+            ))
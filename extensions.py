@@ -0,0 +1,13 @@
+from assets import AssetPipeline
+from autocomplete import Autocomplete
+from cache import ResponseCache
+from health import HealthCheck
+from instrumentation import RequestInstrumentation
+
+# Bound to an app by app.create_app. They live here rather than in app.py so
+# blueprints can decorate their views with them before any app exists.
+cache = ResponseCache()
+instrumentation = RequestInstrumentation()
+assets = AssetPipeline()
+autocomplete = Autocomplete()
+health = HealthCheck()
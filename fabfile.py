@@ -13,6 +13,14 @@ def test():
         abort("Aborted at user request.")
 
 
+def assets():
+    local("flask assets")
+
+
+def bench():
+    local("python -m benchmarks.routes --out bench_report.json")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+
+from ical import calendar
+from models import db, Venue, Artist, Show
+from queries import calendar_query, in_window
+from views import time_window
+
+bp = Blueprint('feeds', __name__)
+
+
+def calendar_feed(name, query):
+    """Stream ``query`` as an iCalendar feed, filtered by ``?from=&to=&city=``.
+
+    Rows come from a server-side cursor STREAM_CHUNK_ROWS at a time, so a
+    subscriber polling a wide window never makes a worker hold every show
+    at once. Without ``?from=``, the feed starts CALENDAR_PAST_DAYS ago.
+    """
+    config = current_app.config
+    starts_from, starts_before, city = time_window()
+    if starts_from is None:
+        starts_from = datetime.now() - timedelta(days=config['CALENDAR_PAST_DAYS'])
+    shows = in_window(query, starts_from, starts_before, city).yield_per(config['STREAM_CHUNK_ROWS'])
+    response = Response(stream_with_context(calendar(name, shows, request.host)), mimetype='text/calendar')
+    response.cache_control.public = True
+    response.cache_control.max_age = config['CALENDAR_MAX_AGE']
+    return response
+
+
+@bp.route('/shows.ics')
+@db.reads_from_replica
+def shows():
+    return calendar_feed('Fyyur | Shows', calendar_query())
+
+
+@bp.route('/venues/<int:venue_id>/shows.ics')
+@db.reads_from_replica
+def venue_shows(venue_id):
+    name = db.session.query(Venue.name).filter(Venue.id == venue_id).scalar()
+    if name is None:
+        abort(404)
+    return calendar_feed(f'Fyyur | {name}', calendar_query().filter(Show.venue_id == venue_id))
+
+
+@bp.route('/artists/<int:artist_id>/shows.ics')
+@db.reads_from_replica
+def artist_shows(artist_id):
+    name = db.session.query(Artist.name).filter(Artist.id == artist_id).scalar()
+    if name is None:
+        abort(404)
+    return calendar_feed(f'Fyyur | {name}', calendar_query().filter(Show.artist_id == artist_id))
@@ -1,45 +1,79 @@
 from datetime import datetime
 from enum import Enum
 
+from flask import url_for
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL, Length, Regexp
+from markupsafe import Markup
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField
+from wtforms.validators import DataRequired, InputRequired, AnyOf, URL, Length, Regexp, Optional, NumberRange
+from wtforms.widgets import TextInput, html_params
+
+from models import SHOW_DEFAULT_MINUTES, SHOW_MAX_MINUTES
 
 
 class Genres(Enum):
-    ALTERNATIVE = 1
-    BLUES = 1
-    CLASSICAL = 1
-    COUNTRY = 1
-    ELECTRONIC = 1
-    FOLK = 1
-    FUNK = 1
-    HIPHOP = 1
-    HEAVY_METAL = 1
-    INSTRUMENTAL = 1
-    JAZZ = 1
-    MUSICAL_THEATRE = 1
-    POP = 1
-    PUNK = 1
-    RNB = 1
-    REGGAE = 1
-    ROCKNROLL = 1
-    SOUL = 1
-    OTHER = 1
+    ALTERNATIVE = 'Alternative'
+    BLUES = 'Blues'
+    CLASSICAL = 'Classical'
+    COUNTRY = 'Country'
+    ELECTRONIC = 'Electronic'
+    FOLK = 'Folk'
+    FUNK = 'Funk'
+    HIPHOP = 'Hip-Hop'
+    HEAVY_METAL = 'Heavy Metal'
+    INSTRUMENTAL = 'Instrumental'
+    JAZZ = 'Jazz'
+    MUSICAL_THEATRE = 'Musical Theatre'
+    POP = 'Pop'
+    PUNK = 'Punk'
+    RNB = 'R&B'
+    REGGAE = 'Reggae'
+    ROCKNROLL = 'Rock n Roll'
+    SOUL = 'Soul'
+    OTHER = 'Other'
+
+
+GENRE_CHOICES = [(genre.value, genre.value) for genre in Genres]
+
+
+class AutocompleteInput(TextInput):
+    """An id input preceded by a name search box that suggests from ``/autocomplete/<kind>``.
+
+    Picking a suggestion fills in the id (static/js/script.js); the id can
+    still be typed directly.
+    """
+
+    def __init__(self, kind):
+        super().__init__()
+        self.kind = kind
+
+    def __call__(self, field, **kwargs):
+        kwargs.setdefault('id', field.id)
+        search = html_params(
+            type='search', class_=kwargs.get('class', kwargs.get('class_', '')), placeholder='Start typing a name',
+            autocomplete='off', list=f'{kwargs["id"]}-suggestions',
+            data_autocomplete=url_for('autocomplete', kind=self.kind), data_autocomplete_target=kwargs['id'])
+        return Markup(f'<input {search}><datalist id="{kwargs["id"]}-suggestions"></datalist>') \
+            + super().__call__(field, **kwargs)
 
 
 class ShowForm(Form):
-    artist_id = StringField(
-        'artist_id'
+    artist_id = IntegerField(
+        'artist_id', validators=[InputRequired()], widget=AutocompleteInput('artists')
     )
-    venue_id = StringField(
-        'venue_id'
+    venue_id = IntegerField(
+        'venue_id', validators=[InputRequired()], widget=AutocompleteInput('venues')
     )
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
         default=datetime.today()
     )
+    duration = IntegerField(
+        'duration',
+        validators=[Optional(), NumberRange(min=1, max=SHOW_MAX_MINUTES)],
+        default=SHOW_DEFAULT_MINUTES
+    )
 
 
 class VenueForm(Form):
@@ -118,27 +152,7 @@ class VenueForm(Form):
     genres = SelectMultipleField(
         # Done implement enum restriction
         'genres', validators=[DataRequired()],
-        choices=[
-            (Genres.ALTERNATIVE, 'Alternative'),
-            (Genres.BLUES, 'Blues'),
-            (Genres.CLASSICAL, 'Classical'),
-            (Genres.COUNTRY, 'Country'),
-            (Genres.ELECTRONIC, 'Electronic'),
-            (Genres.FOLK, 'Folk'),
-            (Genres.FUNK, 'Funk'),
-            (Genres.HIPHOP, 'Hip-Hop'),
-            (Genres.HEAVY_METAL, 'Heavy Metal'),
-            (Genres.INSTRUMENTAL, 'Instrumental'),
-            (Genres.JAZZ, 'Jazz'),
-            (Genres.MUSICAL_THEATRE, 'Musical Theatre'),
-            (Genres.POP, 'Pop'),
-            (Genres.PUNK, 'Punk'),
-            (Genres.RNB, 'R&B'),
-            (Genres.REGGAE, 'Reggae'),
-            (Genres.ROCKNROLL, 'Rock n Roll'),
-            (Genres.SOUL, 'Soul'),
-            (Genres.OTHER, 'Other'),
-        ]
+        choices=GENRE_CHOICES
     )
     facebook_link = StringField(
         'facebook_link', validators=[URL()]
@@ -220,34 +234,14 @@ class ArtistForm(Form):
     phone = StringField(
         # Done implement validation logic for state
         'phone',
-        validators=[DataRequired(), Length(min=10, max=10), Regexp(regex='^[+-]?[0-9]$')]
+        validators=[DataRequired(), Length(min=10, max=10), Regexp(regex='^[+-]?[0-9]+$')]
     )
     image_link = StringField(
         'image_link'
     )
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=[
-            (Genres.ALTERNATIVE, 'Alternative'),
-            (Genres.BLUES, 'Blues'),
-            (Genres.CLASSICAL, 'Classical'),
-            (Genres.COUNTRY, 'Country'),
-            (Genres.ELECTRONIC, 'Electronic'),
-            (Genres.FOLK, 'Folk'),
-            (Genres.FUNK, 'Funk'),
-            (Genres.HIPHOP, 'Hip-Hop'),
-            (Genres.HEAVY_METAL, 'Heavy Metal'),
-            (Genres.INSTRUMENTAL, 'Instrumental'),
-            (Genres.JAZZ, 'Jazz'),
-            (Genres.MUSICAL_THEATRE, 'Musical Theatre'),
-            (Genres.POP, 'Pop'),
-            (Genres.PUNK, 'Punk'),
-            (Genres.RNB, 'R&B'),
-            (Genres.REGGAE, 'Reggae'),
-            (Genres.ROCKNROLL, 'Rock n Roll'),
-            (Genres.SOUL, 'Soul'),
-            (Genres.OTHER, 'Other'),
-        ]
+        choices=GENRE_CHOICES
     )
     facebook_link = StringField(
         # Done implement enum restriction
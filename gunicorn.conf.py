@@ -0,0 +1,95 @@
+# ----------------------------------------------------------------------------#
+# Production server settings.
+#
+#   gunicorn -c gunicorn.conf.py 'app:create_app()'
+#
+# Every setting can be overridden on the command line or through the
+# environment variables read below.
+# ----------------------------------------------------------------------------#
+
+import os
+
+
+def available_cores():
+    # The cores this process may run on, which is what a container or
+    # taskset grants rather than what the host has.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# One process per core for rendering, which holds the GIL, and threads to
+# overlap database waits. Fewer, wider workers also share each process's
+# autocomplete index among more requests.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, available_cores())))
+threads = int(os.environ.get('SERVER_THREADS', 4))
+
+# Import and build the app once in the master; workers are forked from it,
+# so they start instantly and share its memory and SECRET_KEY.
+preload_app = True
+
+# A request thread holds at most one connection per database, so a pool of
+# `threads` connections without overflow never makes a request wait and
+# bounds what the workers can open. Serving does not need Alembic.
+raw_env = [f'{name}={value}' for name, value in (
+    ('DB_POOL_SIZE', threads),
+    ('DB_MAX_OVERFLOW', 0),
+    ('MIGRATIONS_ENABLED', 0),
+) if name not in os.environ]
+
+# The default response cache is private to each worker: a write served by
+# one worker would leave the pages the others cached stale until they
+# expire. Several workers cache only with a backend they all share.
+shared_cache = os.environ.get('RESPONSE_CACHE_BACKEND', 'cache.lru_backend') != 'cache.lru_backend'
+if workers > 1 and not shared_cache:
+    raw_env += [f'{name}=0' for name in ('RESPONSE_CACHE_ENABLED', 'FRAGMENT_CACHE_ENABLED')
+                if name not in os.environ]
+
+# On SIGTERM or a reload, workers stop accepting connections and get this
+# long to finish the requests they are serving.
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def check_connection_budget(server):
+    """Compare the connections all workers may open with each database's limit."""
+    from models import db
+
+    app = server.app.wsgi()
+    problems = []
+    with app.app_context():
+        for bind, needed, available in db.connection_budget(server.num_workers):
+            if available is None:
+                continue
+            server.log.info('%s database: workers may open %d of %d available connections',
+                            bind, needed, available)
+            if needed > available:
+                problems.append(f'{bind} database: the workers may open {needed} connections, '
+                                f'but only {available} are available')
+        # Forked workers must open their own connections, not share the master's.
+        for bind in [None] + [key for key in (app.config['SQLALCHEMY_BINDS'] or {})]:
+            db.get_engine(app, bind=bind).dispose()
+    return problems
+
+
+def on_starting(server):
+    problems = check_connection_budget(server)
+    if problems:
+        raise RuntimeError('; '.join(problems) + '. Lower WEB_CONCURRENCY or SERVER_THREADS, '
+                           'or raise max_connections.')
+
+
+def on_reload(server):
+    # A reload (SIGHUP) re-reads this file, starts new workers and stops the
+    # old ones gracefully, but keeps the preloaded code: deploy new code by
+    # starting a new master with SIGUSR2 and stopping the old one with SIGTERM.
+    for problem in check_connection_budget(server):
+        server.log.error(problem)
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+
+from flask import g, jsonify
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db
+
+
+class HealthCheck:
+    """``/healthz`` for load balancers and the process manager.
+
+    Reports whether the primary database answers, the usage of this
+    worker's connection pools and how many other requests the worker is
+    serving. Answers 503 when the database does not respond.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.served = 0
+        self.started = time.time()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._enter)
+        app.teardown_request(self._leave)
+        app.add_url_rule('/healthz', 'healthz', self.report)
+        app.extensions['health'] = self
+
+    def _enter(self):
+        g.health_counted = True
+        with self._lock:
+            self.in_flight += 1
+
+    def _leave(self, exc):
+        # Streamed responses tear down once the last chunk is sent.
+        if g.pop('health_counted', False):
+            with self._lock:
+                self.in_flight -= 1
+                self.served += 1
+
+    def report(self):
+        try:
+            db.session.execute(db.text('SELECT 1'))
+            database, status = 'ok', 200
+        except SQLAlchemyError as err:
+            db.session.rollback()
+            database, status = f'unavailable: {err.__class__.__name__}', 503
+        with self._lock:
+            in_flight, served = self.in_flight - 1, self.served
+        return jsonify({
+            'status': 'ok' if status == 200 else 'unhealthy',
+            'database': database,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started),
+            'in_flight': in_flight,
+            'served': served,
+            'pools': db.pool_stats(),
+        }), status
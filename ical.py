@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+# iCalendar (RFC 5545) output for the show feeds.
+
+PRODID = '-//Fyyur//Shows//EN'
+
+
+def escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def timestamp(value):
+    """``value`` as a UTC date-time.
+
+    Naive values are taken to be local times, as stored show times are
+    (they are compared with ``datetime.now()``).
+    """
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def content_line(name, value):
+    """One property, folded so no line is longer than 75 octets."""
+    line = f'{name}:{value}'.encode('utf-8')
+    parts = []
+    while len(line) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character.
+        while cut and (line[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(line[:cut])
+        line = line[cut:]
+    parts.append(line)
+    return b'\r\n '.join(parts).decode('utf-8') + '\r\n'
+
+
+def event(show, host, stamp):
+    location = ', '.join(part for part in (show.venue_name, show.address, show.city, show.state) if part)
+    return ''.join([
+        'BEGIN:VEVENT\r\n',
+        content_line('UID', f'show-{show.id}@{host}'),
+        content_line('DTSTAMP', stamp),
+        content_line('DTSTART', timestamp(show.start_time)),
+        content_line('DTEND', timestamp(show.end_time)),
+        content_line('SUMMARY', escape(f'{show.artist_name} at {show.venue_name}')),
+        content_line('LOCATION', escape(location)),
+        'END:VEVENT\r\n',
+    ])
+
+
+def calendar(name, shows, host, batch=100):
+    """Generate the calendar of ``shows``, ``batch`` events per chunk."""
+    stamp = timestamp(datetime.now(timezone.utc))
+    chunk = [
+        'BEGIN:VCALENDAR\r\n',
+        content_line('VERSION', '2.0'),
+        content_line('PRODID', PRODID),
+        content_line('CALSCALE', 'GREGORIAN'),
+        content_line('X-WR-CALNAME', escape(name)),
+    ]
+    for show in shows:
+        chunk.append(event(show, host, stamp))
+        if len(chunk) >= batch:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append('END:VCALENDAR\r\n')
+    yield ''.join(chunk)
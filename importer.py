@@ -0,0 +1,242 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+from datetime import datetime
+
+from werkzeug.datastructures import MultiDict
+
+from counters import adjust_counters
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, Venue, Artist, Show, Genre, venue_genres, artist_genres
+from scheduling import show_end, find_conflicts, describe_conflict
+
+
+def _venue_row(data):
+    return {
+        'name': data['name'],
+        'city': data['city'],
+        'state': data['state'],
+        'address': data['address'],
+        'phone': data['phone'],
+        'image_link': data['image_link'],
+        'facebook_link': data['facebook_link'],
+        'website': data['website_link'],
+        'seeking_talent': data['seeking_talent'],
+        'seeking_description': data['seeking_description'],
+    }
+
+
+def _artist_row(data):
+    return {
+        'name': data['name'],
+        'city': data['city'],
+        'state': data['state'],
+        'phone': data['phone'],
+        'image_link': data['image_link'],
+        'facebook_link': data['facebook_link'],
+        'website': data['website_link'],
+        'seeking_venue': data['seeking_venue'],
+        'seeking_description': data['seeking_description'],
+    }
+
+
+def _show_row(data):
+    return {
+        'artist_id': data['artist_id'],
+        'venue_id': data['venue_id'],
+        'start_time': data['start_time'],
+        'end_time': show_end(data['start_time'], data['duration']),
+    }
+
+
+class Kind:
+    def __init__(self, form, model, to_row, genre_table=None, genre_key=None):
+        self.form = form
+        self.model = model
+        self.to_row = to_row
+        self.genre_table = genre_table
+        self.genre_key = genre_key
+
+
+KINDS = {
+    'venues': Kind(VenueForm, Venue, _venue_row, venue_genres, 'venue_id'),
+    'artists': Kind(ArtistForm, Artist, _artist_row, artist_genres, 'artist_id'),
+    'shows': Kind(ShowForm, Show, _show_row),
+}
+
+
+def _json_records(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as err:
+            yield number, err
+
+
+def read_records(stream, fmt):
+    """Yield ``(line number, MultiDict, errors)`` for each record of a CSV or JSONL stream.
+
+    ``genres`` may be a JSON list or a comma-separated string. A line that
+    is not a JSON object has no fields but ``errors``, so it is rejected
+    like a record that fails validation.
+    """
+    if fmt == 'csv':
+        records = ((reader.line_num, record) for reader in [csv.DictReader(stream)] for record in reader)
+    else:
+        records = _json_records(stream)
+    for number, record in records:
+        if isinstance(record, json.JSONDecodeError):
+            yield number, None, {'record': [f'Invalid JSON: {record.msg} (column {record.colno}).']}
+            continue
+        if not isinstance(record, dict):
+            yield number, None, {'record': [f'Expected a JSON object, not {type(record).__name__}.']}
+            continue
+        genres = record.pop('genres', None) or []
+        if isinstance(genres, str):
+            genres = [genre.strip() for genre in genres.split(',') if genre.strip()]
+        elif not isinstance(genres, list):
+            genres = [str(genres)]
+        fields = MultiDict({k: '' if v is None else str(v) for k, v in record.items()})
+        fields.setlist('genres', genres)
+        yield number, fields, None
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []
+        # Response cache tags of the venue and artist pages listing imported shows.
+        self.cache_tags = set()
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+
+class Importer:
+    """Validates records with the entity's form and writes them in batches.
+
+    Each batch is written with one COPY per table on Postgres, or one
+    executemany INSERT per table elsewhere, and committed on its own.
+    """
+
+    def __init__(self, kind, batch_size):
+        self.kind = KINDS[kind]
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self.genre_ids = dict(db.session.query(Genre.name, Genre.id).all())
+
+    def run(self, records):
+        batch = []
+        for number, fields, errors in records:
+            if errors:
+                self.result.rejected.append((number, errors))
+                continue
+            form = self.kind.form(formdata=fields, meta={'csrf': False})
+            if not form.validate():
+                self.result.rejected.append((number, form.errors))
+                continue
+            batch.append((number, form.data))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.result
+
+    def _flush(self, batch):
+        conn = db.session.connection()
+        table = self.kind.model.__table__
+        if self.kind.model is Show:
+            batch = self._existing_references(conn, batch)
+            rows = self._free_slots(batch)
+            self._book(rows)
+            self.result.cache_tags.update(
+                tag for row in rows for tag in (f'venue:{row["venue_id"]}', f'artist:{row["artist_id"]}'))
+        else:
+            rows = [self.kind.to_row(data) for _, data in batch]
+            for row, id_ in zip(rows, self._allocate_ids(conn, table, len(rows))):
+                row['id'] = id_
+        self._write(conn, table, rows)
+
+        if self.kind.genre_table is not None:
+            links = [{'genre_id': self.genre_ids[genre], self.kind.genre_key: row['id']}
+                     for row, (_, data) in zip(rows, batch) for genre in data['genres']]
+            self._write(conn, self.kind.genre_table, links)
+        db.session.commit()
+        self.result.imported += len(rows)
+
+    def _existing_references(self, conn, batch):
+        venue_ids = {data['venue_id'] for _, data in batch}
+        artist_ids = {data['artist_id'] for _, data in batch}
+        known_venues = {row[0] for row in conn.execute(db.select(Venue.id).where(Venue.id.in_(venue_ids)))}
+        known_artists = {row[0] for row in conn.execute(db.select(Artist.id).where(Artist.id.in_(artist_ids)))}
+        kept = []
+        for number, data in batch:
+            errors = {}
+            if data['venue_id'] not in known_venues:
+                errors['venue_id'] = ['Unknown venue.']
+            if data['artist_id'] not in known_artists:
+                errors['artist_id'] = ['Unknown artist.']
+            if errors:
+                self.result.rejected.append((number, errors))
+            else:
+                kept.append((number, data))
+        return kept
+
+    def _free_slots(self, batch):
+        """Rows of the shows in ``batch`` that do not double-book their venue; rejects the others."""
+        rows = [(number, self.kind.to_row(data)) for number, data in batch]
+        conflicts = find_conflicts([(row['venue_id'], row['start_time'], row['end_time']) for _, row in rows])
+        kept = []
+        for (number, row), conflict in zip(rows, conflicts):
+            if conflict is None:
+                kept.append(row)
+            elif conflict[0] == 'show':
+                self.result.rejected.append((number, {'start_time': [describe_conflict(conflict)]}))
+            else:
+                self.result.rejected.append(
+                    (number, {'start_time': [f'Overlaps line {rows[conflict[1]][0]} at the same venue.']}))
+        return kept
+
+    def _book(self, rows):
+        now = datetime.now()
+        for row in rows:
+            row['upcoming'] = row['start_time'] > now
+        upcoming = [row for row in rows if row['upcoming']]
+        adjust_counters(Venue, Counter(row['venue_id'] for row in upcoming))
+        adjust_counters(Artist, Counter(row['artist_id'] for row in upcoming))
+
+    def _allocate_ids(self, conn, table, count):
+        if conn.dialect.name == 'postgresql':
+            sequence = f'"{table.name}_id_seq"'
+            return [row[0] for row in conn.exec_driver_sql(
+                f"SELECT nextval('{sequence}') FROM generate_series(1, %(count)s)", {'count': count})]
+        # Without sequences, ids follow the current maximum inside this transaction.
+        start = conn.execute(db.select(db.func.coalesce(db.func.max(table.c.id), 0))).scalar() + 1
+        return range(start, start + count)
+
+    def _write(self, conn, table, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        if conn.dialect.name == 'postgresql':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['\\N' if row[c] is None else row[c] for c in columns])
+            buffer.seek(0)
+            column_list = ', '.join(f'"{c}"' for c in columns)
+            conn.connection.cursor().copy_expert(
+                f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer)
+        else:
+            conn.execute(table.insert(), rows)
@@ -0,0 +1,125 @@
+import heapq
+import json
+import time
+
+from flask import g, has_request_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# How many of the slowest statements a request keeps for the slow log.
+WORST_STATEMENTS = 5
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.worst = []
+
+    def record_statement(self, statement, elapsed):
+        self.statements += 1
+        self.db_time += elapsed
+        entry = (elapsed, self.statements, statement)
+        if len(self.worst) < WORST_STATEMENTS:
+            heapq.heappush(self.worst, entry)
+        else:
+            heapq.heappushpop(self.worst, entry)
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def current_stats():
+    return g.get('request_stats') if has_request_context() else None
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request's stats."""
+
+    def render(self, *args, **kwargs):
+        stats = current_stats()
+        if stats is None:
+            return super().render(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is not None and conn.info.get('statement_started'):
+        stats.record_statement(statement, time.perf_counter() - conn.info['statement_started'].pop())
+
+
+class RequestInstrumentation:
+    """Opt-in per-request SQL and template timing.
+
+    Counts the statements every engine executes during a request (so it
+    covers any bind of ``db``), times them and the template render, and
+    reports the result in a ``Server-Timing`` header. Requests over
+    ``INSTRUMENTATION_SLOW_REQUEST_MS`` or ``INSTRUMENTATION_SLOW_STATEMENTS``
+    are logged as one JSON line with their slowest statements.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION_ENABLED', False)
+        app.config.setdefault('INSTRUMENTATION_SLOW_REQUEST_MS', 500)
+        app.config.setdefault('INSTRUMENTATION_SLOW_STATEMENTS', 20)
+        if not app.config['INSTRUMENTATION_ENABLED']:
+            return
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.jinja_env.template_class = TimedTemplate
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        self.app = app
+
+    def _start(self):
+        g.request_stats = RequestStats()
+
+    def _finish(self, response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        total_ms = stats.total_time * 1000
+        db_ms = stats.db_time * 1000
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;desc="{stats.statements} statements";dur={db_ms:.1f}',
+            f'tpl;desc="template render";dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        config = self.app.config
+        if total_ms > config['INSTRUMENTATION_SLOW_REQUEST_MS'] \
+                or stats.statements > config['INSTRUMENTATION_SLOW_STATEMENTS']:
+            self.app.logger.warning('slow request %s', json.dumps({
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'template_ms': round(stats.template_time * 1000, 1),
+                'statements': stats.statements,
+                'worst_statements': [
+                    {'ms': round(elapsed * 1000, 2), 'sql': ' '.join(statement.split())[:500]}
+                    for elapsed, _, statement in sorted(stats.worst, reverse=True)
+                ],
+            }))
+        return response
@@ -0,0 +1,66 @@
+"""name search indexes
+
+Revision ID: 5a1c0e7d9b42
+Revises: 2fc194178268
+Create Date: 2026-10-18 17:05:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1c0e7d9b42'
+down_revision = '2fc194178268'
+branch_labels = None
+depends_on = None
+
+# (searchable table, FTS5 shadow table on SQLite)
+SEARCH_TABLES = [('Venue', 'venue_fts'), ('Artist', 'artist_fts')]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, _ in SEARCH_TABLES:
+            op.create_index(
+                f'ix_{table.lower()}_name_trgm', table, ['name'],
+                postgresql_using='gin',
+                postgresql_ops={'name': 'gin_trgm_ops'}
+            )
+    elif dialect == 'sqlite':
+        for table, fts in SEARCH_TABLES:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"name, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+            op.execute(f"""
+                CREATE TRIGGER {fts}_ai AFTER INSERT ON "{table}" BEGIN
+                    INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+                END
+            """)
+            op.execute(f"""
+                CREATE TRIGGER {fts}_ad AFTER DELETE ON "{table}" BEGIN
+                    INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+                END
+            """)
+            op.execute(f"""
+                CREATE TRIGGER {fts}_au AFTER UPDATE OF name ON "{table}" BEGIN
+                    INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+                    INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+                END
+            """)
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table, _ in SEARCH_TABLES:
+            op.drop_index(f'ix_{table.lower()}_name_trgm', table_name=table)
+    elif dialect == 'sqlite':
+        for _, fts in SEARCH_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
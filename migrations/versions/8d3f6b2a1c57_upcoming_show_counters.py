@@ -0,0 +1,40 @@
+"""upcoming show counters
+
+Revision ID: 8d3f6b2a1c57
+Revises: 5a1c0e7d9b42
+Create Date: 2026-10-18 17:40:31.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6b2a1c57'
+down_revision = '5a1c0e7d9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('upcoming', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('Venue', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Artist', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill: flag the shows that have not started yet and count them per owner.
+    op.execute(sa.text('UPDATE "Show" SET upcoming = (start_time > :now)').bindparams(now=datetime.now()))
+    for table, fk in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(f'''
+            UPDATE "{table}" SET upcoming_shows_count = (
+                SELECT count(*) FROM "Show"
+                WHERE "Show".{fk} = "{table}".id AND "Show".upcoming
+            )
+        ''')
+
+
+def downgrade():
+    op.drop_column('Artist', 'upcoming_shows_count')
+    op.drop_column('Venue', 'upcoming_shows_count')
+    op.drop_column('Show', 'upcoming')
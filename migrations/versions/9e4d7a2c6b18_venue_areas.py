@@ -0,0 +1,119 @@
+"""venue area rollup
+
+Revision ID: 9e4d7a2c6b18
+Revises: f19c2d7e4a83
+Create Date: 2026-10-18 23:12:05.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4d7a2c6b18'
+down_revision = 'f19c2d7e4a83'
+branch_labels = None
+depends_on = None
+
+# A materialized view can only be refreshed as a whole, so Postgres keeps a
+# table too, maintained by statement-level triggers that apply the summed
+# deltas of all the rows a statement changed.
+
+AREA = "coalesce({row}.city, ''), coalesce({row}.state, '')"
+
+UPSERT = '''
+    INSERT INTO "VenueArea" (city, state, venue_count, upcoming_shows_count)
+    {rows}
+    ON CONFLICT (city, state) DO UPDATE SET
+        venue_count = "VenueArea".venue_count + excluded.venue_count,
+        upcoming_shows_count = "VenueArea".upcoming_shows_count + excluded.upcoming_shows_count;
+'''
+
+SQLITE_TRIGGERS = {
+    'venue_area_insert': ('INSERT', '', ['new']),
+    'venue_area_delete': ('DELETE', '', ['old']),
+    'venue_area_update': ('UPDATE OF city, state, upcoming_shows_count', '''
+        WHEN old.city IS NOT new.city OR old.state IS NOT new.state
+          OR old.upcoming_shows_count != new.upcoming_shows_count''', ['old', 'new']),
+}
+
+POSTGRES_TRIGGERS = {
+    # Not "old" and "new", which PL/pgSQL reserves for the row of row-level triggers.
+    'venue_area_insert': ('INSERT', 'REFERENCING NEW TABLE AS new_venues', ['new_venues']),
+    'venue_area_delete': ('DELETE', 'REFERENCING OLD TABLE AS old_venues', ['old_venues']),
+    'venue_area_update': ('UPDATE', 'REFERENCING OLD TABLE AS old_venues NEW TABLE AS new_venues',
+                          ['old_venues', 'new_venues']),
+}
+
+
+def _delta(row):
+    sign = '-' if row.startswith('old') else ''
+    return f'{AREA.format(row=row)}, {sign}1, {sign}{row}.upcoming_shows_count'
+
+
+def _sqlite_trigger(name, event, when, rows):
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint.
+    statements = ''.join(UPSERT.format(rows=f'SELECT {_delta(row)} WHERE true') for row in rows)
+    return f'''
+        CREATE TRIGGER {name} AFTER {event} ON "Venue" {when} BEGIN
+            {statements}
+            DELETE FROM "VenueArea" WHERE venue_count = 0;
+        END
+    '''
+
+
+def _postgres_function(name, rows):
+    deltas = ' UNION ALL '.join(f'SELECT {_delta(row)} FROM {row}' for row in rows)
+    # Sorted, so concurrent statements lock the area rows in the same order.
+    summed = f'''
+        SELECT city, state, sum(venues), sum(upcoming)
+        FROM ({deltas}) AS delta (city, state, venues, upcoming)
+        GROUP BY city, state
+        HAVING sum(venues) != 0 OR sum(upcoming) != 0
+        ORDER BY city, state
+    '''
+    return f'''
+        CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            {UPSERT.format(rows=summed)}
+            DELETE FROM "VenueArea" WHERE venue_count = 0;
+            RETURN NULL;
+        END
+        $$
+    '''
+
+
+def upgrade():
+    op.create_table(
+        'VenueArea',
+        sa.Column('city', sa.String(length=120), nullable=False),
+        sa.Column('state', sa.String(length=120), nullable=False),
+        sa.Column('venue_count', sa.Integer(), nullable=False),
+        sa.Column('upcoming_shows_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('city', 'state')
+    )
+    op.execute(f'''
+        INSERT INTO "VenueArea" (city, state, venue_count, upcoming_shows_count)
+        SELECT {AREA.format(row='"Venue"')}, count(*), sum(upcoming_shows_count)
+        FROM "Venue" GROUP BY 1, 2
+    ''')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, (event, referencing, rows) in POSTGRES_TRIGGERS.items():
+            op.execute(_postgres_function(name, rows))
+            op.execute(f'''
+                CREATE TRIGGER {name} AFTER {event} ON "Venue" {referencing}
+                FOR EACH STATEMENT EXECUTE PROCEDURE {name}()
+            ''')
+    else:
+        for name, (event, when, rows) in SQLITE_TRIGGERS.items():
+            op.execute(_sqlite_trigger(name, event, when, rows))
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for name in POSTGRES_TRIGGERS:
+        op.execute(f'DROP TRIGGER {name} ON "Venue"' if postgresql else f'DROP TRIGGER {name}')
+        if postgresql:
+            op.execute(f'DROP FUNCTION {name}()')
+    op.drop_table('VenueArea')
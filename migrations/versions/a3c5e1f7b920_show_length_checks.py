@@ -0,0 +1,93 @@
+"""show length check constraints
+
+Revision ID: a3c5e1f7b920
+Revises: 9e4d7a2c6b18
+Create Date: 2026-10-19 10:02:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e1f7b920'
+down_revision = '9e4d7a2c6b18'
+branch_labels = None
+depends_on = None
+
+# models.SHOW_MAX_MINUTES at the time of this revision. The overlap guards
+# only look this far back for shows that could reach into a booking, so
+# longer shows must be impossible.
+MAX_MINUTES = 12 * 60
+
+OVERLAP_ERROR = 'show overlaps another booking of its venue'
+
+CHECKS = [
+    ('ck_show_ends_after_start', 'end_time > start_time'),
+    ('ck_show_max_length', 'end_time <= {latest}'),
+]
+
+
+def _latest_end(dialect):
+    if dialect == 'postgresql':
+        return f"start_time + interval '{MAX_MINUTES} minutes'"
+    # Keep the fractional seconds SQLAlchemy stores, so times compare as strings.
+    return f"strftime('%Y-%m-%d %H:%M:%S', start_time, '+{MAX_MINUTES} minutes') || substr(start_time, 20)"
+
+
+def _sqlite_trigger(name, event, exclude_self):
+    # As created by f19c2d7e4a83; SQLite drops triggers with the table that
+    # batch mode copies, so they are created again.
+    return f'''
+        CREATE TRIGGER {name} BEFORE {event} ON "Show"
+        WHEN EXISTS (
+            SELECT 1 FROM "Show"
+            WHERE venue_id = NEW.venue_id
+              {'AND id != NEW.id' if exclude_self else ''}
+              AND start_time >= datetime(NEW.start_time, '-{MAX_MINUTES} minutes')
+              AND start_time < NEW.end_time
+              AND end_time > NEW.start_time
+        )
+        BEGIN
+            SELECT RAISE(ABORT, '{OVERLAP_ERROR}');
+        END
+    '''
+
+
+def _create_overlap_triggers():
+    op.execute(_sqlite_trigger('show_no_overlap_insert', 'INSERT', exclude_self=False))
+    op.execute(_sqlite_trigger('show_no_overlap_update', 'UPDATE OF venue_id, start_time, end_time',
+                               exclude_self=True))
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    checks = [(name, condition.format(latest=_latest_end(dialect))) for name, condition in CHECKS]
+    # Checked before any change, as SQLite DDL is not rolled back on failure.
+    invalid = op.get_bind().execute(sa.text(
+        f'SELECT id FROM "Show" WHERE NOT ({" AND ".join(condition for _, condition in checks)}) LIMIT 10'
+    )).fetchall()
+    if invalid:
+        raise RuntimeError(
+            f'Shows that end before they start or last longer than {MAX_MINUTES} minutes; '
+            'fix their end_time before upgrading: ' + ', '.join(str(id_) for id_, in invalid))
+
+    if dialect == 'postgresql':
+        for name, condition in checks:
+            op.create_check_constraint(name, 'Show', condition)
+    else:
+        with op.batch_alter_table('Show', recreate='always') as batch_op:
+            for name, condition in checks:
+                batch_op.create_check_constraint(name, condition)
+        _create_overlap_triggers()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in CHECKS:
+            op.drop_constraint(name, 'Show', type_='check')
+    else:
+        with op.batch_alter_table('Show', recreate='always') as batch_op:
+            for name, _ in CHECKS:
+                batch_op.drop_constraint(name, type_='check')
+        _create_overlap_triggers()
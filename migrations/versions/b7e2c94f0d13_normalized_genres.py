@@ -0,0 +1,125 @@
+"""normalized genres
+
+Revision ID: b7e2c94f0d13
+Revises: 8d3f6b2a1c57
+Create Date: 2026-10-18 18:10:44.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c94f0d13'
+down_revision = '8d3f6b2a1c57'
+branch_labels = None
+depends_on = None
+
+# Snapshot of forms.Genres at the time of this migration: (member name, label).
+GENRES = [
+    ('ALTERNATIVE', 'Alternative'),
+    ('BLUES', 'Blues'),
+    ('CLASSICAL', 'Classical'),
+    ('COUNTRY', 'Country'),
+    ('ELECTRONIC', 'Electronic'),
+    ('FOLK', 'Folk'),
+    ('FUNK', 'Funk'),
+    ('HIPHOP', 'Hip-Hop'),
+    ('HEAVY_METAL', 'Heavy Metal'),
+    ('INSTRUMENTAL', 'Instrumental'),
+    ('JAZZ', 'Jazz'),
+    ('MUSICAL_THEATRE', 'Musical Theatre'),
+    ('POP', 'Pop'),
+    ('PUNK', 'Punk'),
+    ('RNB', 'R&B'),
+    ('REGGAE', 'Reggae'),
+    ('ROCKNROLL', 'Rock n Roll'),
+    ('SOUL', 'Soul'),
+    ('OTHER', 'Other'),
+]
+
+# (owner table, association table, owner key)
+OWNERS = [('Venue', 'venue_genres', 'venue_id'), ('Artist', 'artist_genres', 'artist_id')]
+
+BATCH_SIZE = 1000
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z]', '', name.lower().replace('genres.', ''))
+
+
+def upgrade():
+    genre = op.create_table(
+        'Genre',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    for table, assoc, key in OWNERS:
+        op.create_table(
+            assoc,
+            sa.Column('genre_id', sa.Integer(), nullable=False),
+            sa.Column(key, sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+            sa.ForeignKeyConstraint([key], [f'{table}.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('genre_id', key)
+        )
+        op.create_index(f'ix_{assoc}_{key}', assoc, [key], unique=False)
+
+    op.bulk_insert(genre, [{'name': label} for _, label in GENRES])
+
+    # Stored values are labels ("Hip-Hop") or enum reprs ("Genres.HIPHOP");
+    # anything outside the vocabulary becomes "Other".
+    conn = op.get_bind()
+    ids_by_label = dict(conn.execute(sa.select(genre.c.name, genre.c.id)).fetchall())
+    genre_ids = {}
+    for member, label in GENRES:
+        genre_ids[_normalize(member)] = genre_ids[_normalize(label)] = ids_by_label[label]
+    other_id = genre_ids['other']
+
+    for table, assoc, key in OWNERS:
+        owner = sa.table(table, sa.column('id'), sa.column('genres'))
+        link = sa.table(assoc, sa.column('genre_id'), sa.column(key))
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                sa.select(owner.c.id, owner.c.genres)
+                .where(owner.c.id > last_id)
+                .order_by(owner.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            links = set()
+            for owner_id, genres in rows:
+                for name in (genres or '').split(','):
+                    if name.strip():
+                        links.add((genre_ids.get(_normalize(name), other_id), owner_id))
+            if links:
+                conn.execute(link.insert(), [{'genre_id': g, key: o} for g, o in links])
+            last_id = rows[-1].id
+
+    for table, _, _ in OWNERS:
+        op.drop_column(table, 'genres')
+
+
+def downgrade():
+    conn = op.get_bind()
+    for table, assoc, key in OWNERS:
+        op.add_column(table, sa.Column('genres', sa.String(length=120), nullable=True))
+        owner = sa.table(table, sa.column('id'), sa.column('genres'))
+        rows = conn.execute(sa.text(
+            f'SELECT a.{key}, g.name FROM {assoc} a JOIN "Genre" g ON g.id = a.genre_id '
+            f'ORDER BY a.{key}, g.name'
+        )).fetchall()
+        names = {}
+        for owner_id, name in rows:
+            names.setdefault(owner_id, []).append(name)
+        for owner_id, genres in names.items():
+            conn.execute(owner.update().where(owner.c.id == owner_id).values(genres=','.join(genres)))
+        op.drop_index(f'ix_{assoc}_{key}', table_name=assoc)
+        op.drop_table(assoc)
+    op.drop_table('Genre')
@@ -0,0 +1,74 @@
+"""show surrogate key and indexes
+
+Revision ID: c41a7d5e8f26
+Revises: b7e2c94f0d13
+Create Date: 2026-10-18 18:42:09.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a7d5e8f26'
+down_revision = 'b7e2c94f0d13'
+branch_labels = None
+depends_on = None
+
+SHOW_INDEXES = [
+    ('ix_show_venue_id_start_time', ['venue_id', 'start_time']),
+    ('ix_show_artist_id_start_time', ['artist_id', 'start_time']),
+    ('ix_show_start_time', ['start_time', 'venue_id', 'artist_id']),
+]
+
+
+def _copy_show_table(id_column):
+    # SQLite cannot change a primary key in place, so rebuild the table.
+    columns = [
+        sa.Column('artist_id', sa.Integer(), nullable=False),
+        sa.Column('venue_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('upcoming', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+        sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    ]
+    if id_column:
+        columns += [sa.Column('id', sa.Integer(), nullable=False), sa.PrimaryKeyConstraint('id')]
+    else:
+        columns += [sa.PrimaryKeyConstraint('artist_id', 'venue_id')]
+    op.create_table('_Show_new', *columns)
+    op.execute(
+        'INSERT INTO "_Show_new" (artist_id, venue_id, start_time, upcoming) '
+        'SELECT artist_id, venue_id, start_time, upcoming FROM "Show" ORDER BY start_time'
+    )
+    op.drop_table('Show')
+    op.rename_table('_Show_new', 'Show')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('Show_pkey', 'Show', type_='primary')
+        op.execute('ALTER TABLE "Show" ADD COLUMN id SERIAL PRIMARY KEY')
+    else:
+        _copy_show_table(id_column=True)
+
+    for name, columns in SHOW_INDEXES:
+        op.create_index(name, 'Show', columns, unique=False)
+    op.create_index('ix_venue_city_state', 'Venue', ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_venue_city_state', table_name='Venue')
+    for name, _ in SHOW_INDEXES:
+        op.drop_index(name, table_name='Show')
+
+    # Only one show per (artist, venue) fits the old key; keep the earliest.
+    op.execute(
+        'DELETE FROM "Show" WHERE id NOT IN '
+        '(SELECT min(id) FROM "Show" GROUP BY artist_id, venue_id)'
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_column('Show', 'id')
+        op.create_primary_key('Show_pkey', 'Show', ['artist_id', 'venue_id'])
+    else:
+        _copy_show_table(id_column=False)
@@ -0,0 +1,26 @@
+"""row versions
+
+Revision ID: e3b8a6f4d210
+Revises: c41a7d5e8f26
+Create Date: 2026-10-18 21:05:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8a6f4d210'
+down_revision = 'c41a7d5e8f26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('Artist', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('Artist', 'version')
+    op.drop_column('Venue', 'version')
@@ -0,0 +1,90 @@
+"""show end time and venue double-booking guard
+
+Revision ID: f19c2d7e4a83
+Revises: e3b8a6f4d210
+Create Date: 2026-10-18 21:48:37.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19c2d7e4a83'
+down_revision = 'e3b8a6f4d210'
+branch_labels = None
+depends_on = None
+
+# models.SHOW_DEFAULT_MINUTES and SHOW_MAX_MINUTES at the time of this revision.
+DEFAULT_MINUTES = 120
+MAX_MINUTES = 12 * 60
+
+OVERLAP_ERROR = 'show overlaps another booking of its venue'
+
+
+def _sqlite_trigger(name, event, exclude_self):
+    # The start_time lower bound keeps the lookup a short range scan of
+    # ix_show_venue_id_start_time: no show lasts longer than MAX_MINUTES.
+    return f'''
+        CREATE TRIGGER {name} BEFORE {event} ON "Show"
+        WHEN EXISTS (
+            SELECT 1 FROM "Show"
+            WHERE venue_id = NEW.venue_id
+              {'AND id != NEW.id' if exclude_self else ''}
+              AND start_time >= datetime(NEW.start_time, '-{MAX_MINUTES} minutes')
+              AND start_time < NEW.end_time
+              AND end_time > NEW.start_time
+        )
+        BEGIN
+            SELECT RAISE(ABORT, '{OVERLAP_ERROR}');
+        END
+    '''
+
+
+def _end_time(dialect, start):
+    if dialect == 'postgresql':
+        return f"{start} + interval '{DEFAULT_MINUTES} minutes'"
+    # Keep the fractional seconds SQLAlchemy stores, so times compare as strings.
+    return f"strftime('%Y-%m-%d %H:%M:%S', {start}, '+{DEFAULT_MINUTES} minutes') || substr({start}, 20)"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    # Checked before any change, as SQLite DDL is not rolled back on failure.
+    overlaps = op.get_bind().execute(sa.text(f'''
+        SELECT a.id, b.id, a.venue_id FROM "Show" a JOIN "Show" b
+            ON a.venue_id = b.venue_id AND a.id < b.id
+           AND a.start_time < {_end_time(dialect, 'b.start_time')}
+           AND b.start_time < {_end_time(dialect, 'a.start_time')}
+        LIMIT 10
+    ''')).fetchall()
+    if overlaps:
+        raise RuntimeError(
+            'Existing shows are double-booked; move or delete one of each pair before upgrading: '
+            + ', '.join(f'shows {a} and {b} at venue {venue}' for a, b, venue in overlaps))
+
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    op.execute(f'UPDATE "Show" SET end_time = {_end_time(dialect, "start_time")}')
+
+    if dialect == 'postgresql':
+        op.alter_column('Show', 'end_time', nullable=False)
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute('''
+            ALTER TABLE "Show" ADD CONSTRAINT show_venue_no_overlap
+            EXCLUDE USING gist (venue_id WITH =, tsrange(start_time, end_time) WITH &&)
+        ''')
+    else:
+        with op.batch_alter_table('Show') as batch_op:
+            batch_op.alter_column('end_time', existing_type=sa.DateTime(), nullable=False)
+        op.execute(_sqlite_trigger('show_no_overlap_insert', 'INSERT', exclude_self=False))
+        op.execute(_sqlite_trigger('show_no_overlap_update', 'UPDATE OF venue_id, start_time, end_time',
+                                   exclude_self=True))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('show_venue_no_overlap', 'Show')
+    else:
+        op.execute('DROP TRIGGER show_no_overlap_update')
+        op.execute('DROP TRIGGER show_no_overlap_insert')
+    op.drop_column('Show', 'end_time')
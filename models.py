@@ -1,22 +1,66 @@
 from datetime import datetime
 
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
-db = SQLAlchemy()
+from database import RoutingSQLAlchemy
+
+db = RoutingSQLAlchemy()
+
+# Length of a show booked without one, and the longest a show may last.
+SHOW_DEFAULT_MINUTES = 120
+SHOW_MAX_MINUTES = 12 * 60
+
+# Association tables are keyed genre first so filtering by genre is an index range scan.
+artist_genres = db.Table(
+    'artist_genres',
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True,
+              index=True),
+)
+
+venue_genres = db.Table(
+    'venue_genres',
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True,
+              index=True),
+)
+
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
 
 
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_show_start_time', 'start_time', 'venue_id', 'artist_id'),
+    )
 
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), primary_key=True)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), primary_key=True)
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     start_time = db.Column(db.DateTime)
+    # Shows of a venue never overlap: an exclusion constraint on Postgres and
+    # insert/update triggers on SQLite enforce it (see scheduling.py). Check
+    # constraints keep end_time after start_time and within SHOW_MAX_MINUTES,
+    # the furthest back those guards look.
+    end_time = db.Column(db.DateTime, nullable=False)
+    # Whether this show is still included in its venue's and artist's upcoming_shows_count
+    upcoming = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     def as_dict(self):
         return {
+            'id': self.id,
             'artist_id': self.artist_id,
             'venue_id': self.venue_id,
-            'start_time': str(self.start_time)
+            'start_time': self.start_time,
+            'end_time': self.end_time,
         }
 
 
@@ -28,12 +72,16 @@ class Artist(db.Model):
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=artist_genres, order_by='Genre.name')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped by every edit of the row or its genres, but not by the show
+    # counters; see bump_versions
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     shows = db.relationship('Show', backref='artist')
 
     def as_dict(self):
@@ -45,16 +93,20 @@ class Artist(db.Model):
             'phone': self.phone,
             'image_link': self.image_link,
             'facebook_link': self.facebook_link,
-            'genres': self.genres,
+            'genres': [genre.name for genre in self.genres],
             'website': self.website,
             'seeking_venue': self.seeking_venue,
             'seeking_description': self.seeking_description,
-            'shows': self.shows
+            'upcoming_shows_count': self.upcoming_shows_count,
+            'version': self.version,
         }
 
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_venue_city_state', 'city', 'state'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120))
@@ -64,10 +116,14 @@ class Venue(db.Model):
     phone = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=venue_genres, order_by='Genre.name')
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped by every edit of the row or its genres, but not by the show
+    # counters; see bump_versions
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     shows = db.relationship('Show', backref='venue')
 
     def as_dict(self):
@@ -80,9 +136,37 @@ class Venue(db.Model):
             'phone': self.phone,
             'image_link': self.image_link,
             'facebook_link': self.facebook_link,
-            'genres': self.genres,
+            'genres': [genre.name for genre in self.genres],
             'website': self.website,
             'seeking_talent': self.seeking_talent,
             'seeking_description': self.seeking_description,
-            'shows': self.shows,
+            'upcoming_shows_count': self.upcoming_shows_count,
+            'version': self.version,
         }
+
+
+class VenueArea(db.Model):
+    """Venue count and upcoming shows of each ``(city, state)``.
+
+    Maintained by triggers on Venue (see the venue_areas migration); a
+    missing city or state is stored as ''. ``flask rollup rebuild``
+    recomputes it from scratch.
+    """
+    __tablename__ = 'VenueArea'
+
+    city = db.Column(db.String(120), primary_key=True)
+    state = db.Column(db.String(120), primary_key=True)
+    venue_count = db.Column(db.Integer, nullable=False)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False)
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_versions(session, flush_context, instances):
+    """Give every edited Venue and Artist a new version.
+
+    Bulk UPDATEs bypass this; editing.apply_edit bumps ``version`` itself,
+    while the show counters (counters.py) leave it alone.
+    """
+    for obj in session.dirty:
+        if isinstance(obj, (Venue, Artist)) and session.is_modified(obj):
+            obj.version = type(obj).version + 1
@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the sort key of the last row on a page."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor, types):
+    """Inverse of :func:`encode_cursor`; ``types`` converts each key part back."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(payload) != len(types):
+            raise ValueError('cursor has the wrong number of keys')
+        return [datetime.fromisoformat(v) if t is datetime else t(v)
+                for t, v in zip(types, payload)]
+    except (ValueError, TypeError) as err:
+        raise InvalidCursor(str(err)) from err
+
+
+def after_cursor(query, columns, cursor):
+    """Restrict ``query`` to the rows sorting after ``cursor`` on ``columns``."""
+    if not cursor:
+        return query
+    after = decode_cursor(cursor, [c.type.python_type for c in columns])
+    return query.filter(tuple_(*columns) > tuple_(*after))
+
+
+def keyset_page(query, columns, cursor, limit):
+    """Fetch one page of ``query`` ordered by ``columns``, starting after ``cursor``.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+    Rows must expose the sort columns under the same attribute names.
+    """
+    rows = after_cursor(query, columns, cursor).order_by(*columns).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+from models import db, Venue, VenueArea, Show, Artist, Genre, venue_genres
+
+# Sort key of the /shows listing; Show.id breaks ties between identical bookings.
+SHOWS_ORDER = [Show.start_time, Show.venue_id, Show.artist_id, Show.id]
+
+
+def venue_area_query():
+    """Every area with its venue and upcoming show counts, from the VenueArea rollup."""
+    return db.session.query(VenueArea).order_by(VenueArea.city, VenueArea.state)
+
+
+def _same_area_part(column, value):
+    # The rollup files NULL and empty cities and states under ''.
+    return column == value if value else db.or_(column.is_(None), column == '')
+
+
+def venue_listing_query(genre=None, city=None, state=None):
+    """Venues with their upcoming show counter, in area order (ix_venue_city_state).
+
+    ``city`` and ``state`` filter when not ``None``; ``''`` matches venues
+    without one, like the ``''`` of their VenueArea row.
+    """
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    )
+    if genre:
+        query = query.join(venue_genres).join(Genre).filter(Genre.name == genre)
+    if city is not None:
+        query = query.filter(_same_area_part(Venue.city, city))
+    if state is not None:
+        query = query.filter(_same_area_part(Venue.state, state))
+    return query.order_by(Venue.city, Venue.state, Venue.id)
+
+
+def venue_shows_query(venue_id):
+    """A venue's shows with their artist (ix_show_venue_id_start_time)."""
+    return db.session.query(
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).join(Artist, Artist.id == Show.artist_id).filter(
+        Show.venue_id == venue_id
+    ).order_by(Show.start_time)
+
+
+def artist_shows_query(artist_id):
+    """An artist's shows with their venue (ix_show_artist_id_start_time)."""
+    return db.session.query(
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link'),
+        Show.start_time
+    ).join(Venue, Venue.id == Show.venue_id).filter(
+        Show.artist_id == artist_id
+    ).order_by(Show.start_time)
+
+
+def shows_listing_query(since=None):
+    """Shows joined to venue and artist for the /shows tiles (ix_show_start_time)."""
+    query = db.session.query(
+        Show.id,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time,
+        Show.end_time
+    ).join(Venue, Venue.id == Show.venue_id).join(Artist, Artist.id == Show.artist_id)
+    if since is not None:
+        query = query.filter(Show.start_time > since)
+    return query
+
+
+def in_window(query, starts_from=None, starts_before=None, city=None):
+    """Restrict a query over Show joined to Venue to shows starting in ``[starts_from, starts_before)``.
+
+    The bounds are a range of ix_show_start_time (or of the venue/artist
+    start_time index when the query is for one of them); ``city`` filters
+    the joined venues.
+    """
+    if starts_from is not None:
+        query = query.filter(Show.start_time >= starts_from)
+    if starts_before is not None:
+        query = query.filter(Show.start_time < starts_before)
+    if city:
+        query = query.filter(Venue.city == city)
+    return query
+
+
+def calendar_query():
+    """Shows with what their calendar events need, in start time order."""
+    return db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.end_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.address,
+        Venue.city,
+        Venue.state,
+        Show.artist_id,
+        Artist.name.label('artist_name')
+    ).join(Venue, Venue.id == Show.venue_id).join(Artist, Artist.id == Show.artist_id) \
+        .order_by(Show.start_time, Show.id)
+
+
+def hot_queries():
+    """The listing and detail queries with the index each one is expected to use."""
+    return [
+        ('venue listing', venue_listing_query(), 'ix_venue_city_state'),
+        ('venues of an area', venue_listing_query(city='San Francisco', state='CA'), 'ix_venue_city_state'),
+        ('venue detail shows', venue_shows_query(1), 'ix_show_venue_id_start_time'),
+        ('artist detail shows', artist_shows_query(1), 'ix_show_artist_id_start_time'),
+        ('upcoming shows page', shows_listing_query(datetime.now()).order_by(*SHOWS_ORDER).limit(30),
+         'ix_show_start_time'),
+        ('shows in a window', in_window(shows_listing_query(), datetime.now(), datetime.now() + timedelta(days=30))
+         .order_by(*SHOWS_ORDER).limit(30), 'ix_show_start_time'),
+        ('venue calendar feed', calendar_query().filter(Show.venue_id == 1), 'ix_show_venue_id_start_time'),
+    ]
+
+
+def explain(query):
+    """Query plan of ``query`` on the bound database, one string per plan line.
+
+    On Postgres sequential scans are disabled for the check, so the plan
+    shows whether an index *can* serve the query even on a tiny dataset.
+    """
+    conn = db.session.connection()
+    dialect = conn.dialect
+    compiled = query.statement.compile(dialect=dialect)
+    if dialect.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    if dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).fetchall()
+        return [row[-1] for row in rows]
+    if dialect.name == 'postgresql':
+        conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    rows = conn.exec_driver_sql('EXPLAIN ' + str(compiled), params).fetchall()
+    return [row[0] for row in rows]
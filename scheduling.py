@@ -0,0 +1,90 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from models import db, Show, SHOW_DEFAULT_MINUTES, SHOW_MAX_MINUTES
+
+# Venues per range query, to keep the OR of venue windows well below the
+# expression depth limits of SQLite.
+VENUES_PER_QUERY = 100
+
+
+def show_end(start_time, duration=None):
+    return start_time + timedelta(minutes=duration or SHOW_DEFAULT_MINUTES)
+
+
+class VenueCalendar:
+    """The booked intervals of one venue, sorted by start time.
+
+    Bookings of a venue never overlap, so they are sorted by end time as
+    well and the only booking that can overlap a new interval is the last
+    one starting before it ends. Checking an interval is one bisect.
+    """
+
+    def __init__(self):
+        # (start, end, ref) tuples
+        self.bookings = []
+
+    def conflict(self, start, end):
+        """What ``[start, end)`` overlaps, or ``None``."""
+        i = bisect_left(self.bookings, (end,)) - 1
+        if i >= 0 and self.bookings[i][1] > start:
+            return self.bookings[i][2]
+        return None
+
+    def add(self, start, end, ref):
+        insort(self.bookings, (start, end, ref))
+
+
+def load_calendars(bookings):
+    """Calendars of the venues of ``bookings`` with the stored shows that could overlap them.
+
+    ``bookings`` are ``(venue_id, start, end)`` tuples. Shows are looked up
+    per venue by a start time range (ix_show_venue_id_start_time); since no
+    show lasts longer than SHOW_MAX_MINUTES, shows starting earlier than
+    that before a window cannot reach into it.
+    """
+    windows = {}
+    for venue_id, start, end in bookings:
+        low, high = windows.get(venue_id, (start, end))
+        windows[venue_id] = (min(low, start), max(high, end))
+
+    calendars = defaultdict(VenueCalendar)
+    longest = timedelta(minutes=SHOW_MAX_MINUTES)
+    venues = list(windows.items())
+    for i in range(0, len(venues), VENUES_PER_QUERY):
+        shows = db.session.query(Show.id, Show.venue_id, Show.start_time, Show.end_time).filter(db.or_(*(
+            db.and_(Show.venue_id == venue_id, Show.start_time > low - longest, Show.start_time < high)
+            for venue_id, (low, high) in venues[i:i + VENUES_PER_QUERY]
+        )))
+        for show in shows:
+            calendars[show.venue_id].bookings.append((show.start_time, show.end_time, ('show', show.id)))
+    # Sorted once, rather than inserting every stored show in place.
+    for calendar in calendars.values():
+        calendar.bookings.sort()
+    return calendars
+
+
+def find_conflicts(bookings):
+    """Check ``bookings`` against the stored shows and against each other.
+
+    ``bookings`` are ``(venue_id, start, end)`` tuples in priority order.
+    Returns one entry per booking: ``None`` if it fits, else what it
+    overlaps, ``('show', id)`` for a stored show or ``('booking', index)``
+    for an earlier booking of the same list.
+    """
+    calendars = load_calendars(bookings)
+    conflicts = []
+    for index, (venue_id, start, end) in enumerate(bookings):
+        conflict = calendars[venue_id].conflict(start, end)
+        if conflict is None:
+            calendars[venue_id].add(start, end, ('booking', index))
+        conflicts.append(conflict)
+    return conflicts
+
+
+def describe_conflict(conflict):
+    kind, ref = conflict
+    if kind == 'show':
+        return f'The venue is already booked by show {ref} at that time.'
+    return f'Overlaps show {ref + 1} of this batch at the same venue.'
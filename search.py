@@ -0,0 +1,44 @@
+from sqlalchemy import func, literal_column, table, column
+
+from models import db
+
+# Trigram indexes can only answer terms of at least three characters.
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_by_name(model, fts_table, search_term, limit, offset=0):
+    """Search ``model`` rows by name, best matches first.
+
+    Postgres filters with ILIKE through the pg_trgm GIN index and ranks by
+    trigram similarity; SQLite matches against the FTS5 trigram table
+    ``fts_table`` and ranks by bm25. Returns ``(total, rows)`` where rows
+    are ``(id, name, upcoming_shows_count)`` tuples for the requested page.
+    """
+    dialect = db.engine.dialect.name
+    query = db.session.query(model.id, model.name, model.upcoming_shows_count)
+
+    if dialect == 'sqlite' and len(search_term) >= MIN_TRIGRAM_LENGTH:
+        fts = table(fts_table, column('rowid'), column('rank'))
+        query = query.join(fts, fts.c.rowid == model.id) \
+            .filter(literal_column(fts_table).op('MATCH')(_fts_phrase(search_term)))
+        order_by = [fts.c.rank, model.id]
+    elif dialect == 'postgresql':
+        query = query.filter(model.name.ilike(f'%{_escape_like(search_term)}%', escape='\\'))
+        order_by = [func.similarity(model.name, search_term).desc(), model.id]
+    else:
+        query = query.filter(
+            func.lower(model.name).like(f'%{_escape_like(search_term.lower())}%', escape='\\'))
+        order_by = [func.length(model.name), model.id]
+
+    total = query.count()
+    rows = query.order_by(*order_by).limit(limit).offset(offset).all()
+    return total, rows
+
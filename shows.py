@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, flash, abort, current_app
+
+from counters import book_show
+from extensions import cache
+from forms import ShowForm
+from models import db, Artist, Show, Venue
+from pagination import keyset_page, after_cursor, InvalidCursor
+from queries import shows_listing_query, in_window, SHOWS_ORDER
+from scheduling import show_end, find_conflicts, describe_conflict
+from views import render_listing, listing_rows, time_window
+
+bp = Blueprint('shows', __name__, url_prefix='/shows')
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('')
+@cache.cached('shows')
+@db.reads_from_replica
+def shows():
+    # displays list of shows at /shows
+    # Done: replace with real venues data.
+    include_past = request.args.get('include_past', 0, type=int)
+    starts_from, starts_before, city = time_window()
+    # An explicit ?from= replaces the default of upcoming shows only.
+    query = shows_listing_query(None if include_past or starts_from else datetime.now())
+    query = in_window(query, starts_from, starts_before, city)
+    filters = {arg: request.args[arg] for arg in ('from', 'to', 'city') if request.args.get(arg)}
+
+    try:
+        if current_app.config['STREAM_LISTINGS']:
+            # A streamed page lists every remaining show instead of one keyset page.
+            query = after_cursor(query, SHOWS_ORDER, request.args.get('cursor'))
+            shows = listing_rows(query.order_by(*SHOWS_ORDER))
+            next_cursor = None
+        else:
+            shows, next_cursor = keyset_page(
+                query, SHOWS_ORDER, request.args.get('cursor'), current_app.config['SHOWS_PER_PAGE'])
+    except InvalidCursor:
+        abort(400)
+
+    return render_listing('pages/shows.html', shows=shows, next_cursor=next_cursor,
+                          include_past=include_past, filters=filters)
+
+
+@bp.route('/create')
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+def check_references(form):
+    """Flag the artist and venue ids of ``form`` that match no row; True when both exist.
+
+    SQLite does not enforce the foreign keys, so they are checked here.
+    """
+    for field, model, message in ((form.artist_id, Artist, 'Unknown artist.'),
+                                  (form.venue_id, Venue, 'Unknown venue.')):
+        if db.session.query(model.id).filter(model.id == field.data).first() is None:
+            field.errors.append(message)
+    return not (form.artist_id.errors or form.venue_id.errors)
+
+
+@bp.route('/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db, upon submitting new show listing form
+    # Done: insert form data as a new Show record in the db, instead
+    form = ShowForm()
+    if not form.validate() or not check_references(form):
+        flash('Show could not be listed! ' + ' '.join(
+            f'{name}: {" ".join(errors)}' for name, errors in form.errors.items()))
+        return render_template('forms/new_show.html', form=form), 400
+    try:
+        show = Show(
+            artist_id=form.artist_id.data,
+            venue_id=form.venue_id.data,
+            start_time=form.start_time.data,
+            end_time=show_end(form.start_time.data, form.duration.data)
+        )
+        conflict, = find_conflicts([(show.venue_id, show.start_time, show.end_time)])
+        if conflict:
+            raise ValueError(describe_conflict(conflict))
+        book_show(show)
+        db.session.add(show)
+        db.session.commit()
+        cache.invalidate('shows', 'venues', f'venue:{show.venue_id}', f'artist:{show.artist_id}')
+        flash('Show was successfully listed!')
+    except Exception as err:
+        db.session.rollback()
+        flash('Error adding Show! ' + str(err))
+    finally:
+        db.session.close()
+
+    # on successful db insert, flash success
+
+    # Done: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    return render_template('pages/home.html')
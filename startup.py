@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from collections import namedtuple
+
+# Run in a fresh interpreter, since the profiling process has imported
+# everything already. The marker separates the interpreter's own start-up
+# imports from the app's.
+PROFILE_SCRIPT = '''
+import sys, time
+sys.stderr.write('-- fyyur startup --\\n')
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(imported - started, created - imported)
+'''
+
+StartupProfile = namedtuple('StartupProfile', 'import_ms create_ms modules')
+
+
+def _parse_importtime(stderr):
+    """``{module: cumulative ms}`` of app.py's imports and of those made by ``create_app``.
+
+    ``-X importtime`` indents nested imports by two spaces per level: app.py
+    is at the top level, the modules it imports one level below, and modules
+    imported lazily inside ``create_app`` at the top level again. A module
+    shared by several others is counted under the first one importing it.
+    """
+    modules = {}
+    lines = stderr.splitlines()
+    if '-- fyyur startup --' in lines:
+        lines = lines[lines.index('-- fyyur startup --') + 1:]
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('    ') or name.strip() == 'app':
+            continue
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def profile_startup(root, runs=3):
+    """Best of ``runs`` cold starts of ``from app import create_app; create_app()``."""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+                                cwd=root, capture_output=True, text=True, check=True)
+        import_s, create_s = map(float, result.stdout.split()[-2:])
+        profile = StartupProfile(import_s * 1000, create_s * 1000, _parse_importtime(result.stderr))
+        if best is None or profile.import_ms + profile.create_ms < best.import_ms + best.create_ms:
+            best = profile
+    return best
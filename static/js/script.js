@@ -2,3 +2,34 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Name suggestions of the id fields rendered by forms.AutocompleteInput.
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('input[data-autocomplete]').forEach(function (search) {
+    var suggestions = document.getElementById(search.getAttribute('list'));
+    var target = document.getElementById(search.dataset.autocompleteTarget);
+    var ids = {};
+    var timer;
+    search.addEventListener('input', function () {
+      if (ids.hasOwnProperty(search.value)) {
+        target.value = ids[search.value];
+        return;
+      }
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        fetch(search.dataset.autocomplete + '?q=' + encodeURIComponent(search.value))
+          .then(function (response) { return response.json(); })
+          .then(function (result) {
+            ids = {};
+            suggestions.innerHTML = '';
+            result.data.forEach(function (item) {
+              var option = document.createElement('option');
+              option.value = item.name + ' (#' + item.id + ')';
+              ids[option.value] = item.id;
+              suggestions.appendChild(option);
+            });
+          });
+      }, 150);
+    });
+  });
+});
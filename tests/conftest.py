@@ -0,0 +1,16 @@
+import pytest
+
+from app import create_app
+from models import db, Genre
+
+
+@pytest.fixture
+def app():
+    app = create_app(SQLALCHEMY_DATABASE_URI='sqlite://', MIGRATIONS_ENABLED=False, TESTING=True,
+                     WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Genre(name='Jazz'))
+        db.session.commit()
+        yield app
+        db.session.remove()
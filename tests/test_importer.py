@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from importer import Importer, read_records
+from models import db, Artist, Venue
+
+
+def test_malformed_json_line_is_rejected_with_its_number():
+    records = list(read_records(io.StringIO('{"name": "Hop"}\n{"name": \n'), 'jsonl'))
+
+    assert (records[0][0], records[0][2]) == (1, None)
+    number, fields, errors = records[1]
+    assert (number, fields) == (2, None)
+    assert errors['record'][0].startswith('Invalid JSON')
+
+
+@pytest.mark.parametrize('line, kind', [('[1]', 'list'), ('"x"', 'str'), ('3', 'int'), ('null', 'NoneType')])
+def test_non_object_json_line_is_rejected(line, kind):
+    (number, fields, errors), = read_records(io.StringIO(line + '\n'), 'jsonl')
+
+    assert (number, fields) == (1, None)
+    assert errors == {'record': [f'Expected a JSON object, not {kind}.']}
+
+
+def test_import_rejects_bad_lines_and_carries_on(app):
+    source = io.StringIO('\n'.join([
+        '{"name": ',
+        '[1]',
+        '{"name": "The Dueling Pianos", "city": "New York", "state": "NY", "phone": "5551234567",'
+        ' "genres": ["Jazz"], "image_link": "", "facebook_link": "https://facebook.com/pianos", "website_link": "",'
+        ' "seeking_description": ""}',
+    ]) + '\n')
+
+    result = Importer('artists', batch_size=10).run(read_records(source, 'jsonl'))
+
+    assert [number for number, _ in result.rejected] == [1, 2]
+    assert result.imported == 1
+
+
+def test_show_import_collects_the_tags_of_its_venues_and_artists(app):
+    db.session.add_all([Venue(id=3, name='The Musical Hop'), Artist(id=4, name='Guns N Petals')])
+    db.session.commit()
+    source = io.StringIO('{"venue_id": 3, "artist_id": 4, "start_time": "2035-04-01 20:00:00"}\n')
+
+    result = Importer('shows', batch_size=10).run(read_records(source, 'jsonl'))
+
+    assert result.imported == 1
+    assert result.cache_tags == {'venue:3', 'artist:4'}
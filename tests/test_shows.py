@@ -0,0 +1,34 @@
+import pytest
+
+from models import db, Artist, Show, Venue
+
+
+@pytest.fixture
+def client(app):
+    db.session.add_all([Venue(id=3, name='The Musical Hop'), Artist(id=4, name='Guns N Petals')])
+    db.session.commit()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('artist_id, venue_id, field, error', [
+    ('4', 'hop', 'venue_id', b'Not a valid integer value.'),
+    ('', '3', 'artist_id', b'This field is required.'),
+    ('9', '3', 'artist_id', b'Unknown artist.'),
+    ('4', '8', 'venue_id', b'Unknown venue.'),
+])
+def test_show_form_rejects_bad_ids(client, artist_id, venue_id, field, error):
+    response = client.post('/shows/create', data={
+        'artist_id': artist_id, 'venue_id': venue_id, 'start_time': '2035-04-01 20:00:00'})
+
+    assert response.status_code == 400
+    assert field.encode() + b': ' + error in response.data
+    assert Show.query.count() == 0
+
+
+def test_show_form_books_known_ids(client):
+    response = client.post('/shows/create', data={
+        'artist_id': '4', 'venue_id': '3', 'start_time': '2035-04-01 20:00:00'})
+
+    assert response.status_code == 200
+    show, = Show.query.all()
+    assert (show.artist_id, show.venue_id) == (4, 3)
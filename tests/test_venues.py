@@ -0,0 +1,30 @@
+from counters import rebuild_venue_areas
+from models import db, Genre, Venue, venue_genres
+
+
+def test_area_without_a_city_lists_its_venues(app):
+    db.session.add_all([Venue(name='The Musical Hop', city='San Francisco', state='CA'),
+                        Venue(name='Roaming Stage', city=None, state='CA')])
+    db.session.flush()
+    rebuild_venue_areas()
+    db.session.commit()
+    client = app.test_client()
+
+    overview = client.get('/venues').data.decode()
+    assert '/venues?city=&amp;state=CA' in overview
+
+    page = client.get('/venues?city=&state=CA').data.decode()
+    assert 'Roaming Stage' in page
+    assert 'The Musical Hop' not in page
+
+
+def test_deleting_a_venue_removes_its_genre_links(app):
+    venue = Venue(name='The Musical Hop', city='San Francisco', state='CA', genres=Genre.query.all())
+    db.session.add(venue)
+    db.session.commit()
+
+    # Without the ORM, only the link table's ON DELETE CASCADE removes them.
+    db.session.execute(Venue.__table__.delete().where(Venue.id == venue.id))
+    db.session.commit()
+
+    assert db.session.query(venue_genres).count() == 0
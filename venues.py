@@ -0,0 +1,210 @@
+from itertools import groupby
+
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from markupsafe import Markup
+from sqlalchemy.orm import joinedload
+
+from counters import release_shows
+from editing import populate_edit_form, changed_values, apply_edit, StaleEdit
+from extensions import cache, autocomplete
+from forms import VenueForm
+from models import db, Venue, Show
+from queries import venue_area_query, venue_listing_query, venue_shows_query
+from search import search_by_name
+from views import (partition_shows, next_show_start, genre_filter, selected_genres, render_listing, listing_rows,
+                   search_page)
+
+bp = Blueprint('venues', __name__, url_prefix='/venues')
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('')
+@cache.cached('venues')
+@db.reads_from_replica
+def venues():
+    # DONE: replace with real venues data.
+    #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
+    genre, city, state = genre_filter(), request.args.get('city'), request.args.get('state')
+    # An area without a city or state is linked with an empty value for it.
+    if not genre and city is None and state is None:
+        # The unfiltered page only lists the areas, straight from the rollup.
+        return render_listing('pages/venues.html', areas=venue_area_query().all())
+
+    venues = listing_rows(venue_listing_query(genre, city, state))
+
+    # Generators, so a streamed page renders each area as its rows arrive.
+    data = ({
+        'city': city,
+        'state': state,
+        'venues': ({
+            'id': v.id,
+            'name': v.name,
+            'num_upcoming_shows': v.num_upcoming_shows
+        } for v in area_venues)
+    } for (city, state), area_venues in groupby(venues, key=lambda v: (v.city, v.state)))
+
+    return render_listing('pages/venues.html', areas=data)
+
+
+@bp.route('/search', methods=['POST'])
+@db.reads_from_replica
+def search_venues():
+    # Done: implement search on artists with partial string search. Ensure it is case-insensitive.
+    # seach for Hop should return "The Musical Hop".
+    # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+    search_term = request.form.get('search_term', '')
+    limit, offset = search_page()
+    total, results = search_by_name(Venue, 'venue_fts', search_term, limit, offset)
+    response = {
+        "count": total,
+        "data": [{
+            "id": result.id,
+            "name": result.name,
+            "num_upcoming_shows": result.upcoming_shows_count
+        } for result in results]
+    }
+    return render_template('pages/search_venues.html', results=response,
+                           search_term=search_term, limit=limit, offset=offset)
+
+
+@bp.route('/<int:venue_id>')
+@cache.cached('venue:{venue_id}')
+@db.reads_from_replica
+def show_venue(venue_id):
+    # shows the venue page with the given venue_id
+    # Done: replace with real venue data from the venues table, using venue_id
+    version = db.session.query(Venue.version).filter(Venue.id == venue_id).scalar()
+    if version is None:
+        abort(404)
+
+    def profile():
+        venue = Venue.query.options(joinedload(Venue.genres)).get(venue_id).as_dict()
+        return render_template('fragments/venue_profile.html', venue=venue), (), None
+
+    def shows():
+        # Bookings of past shows leave the version alone, so the section also
+        # depends on the venue tag, which every show write invalidates.
+        shows = venue_shows_query(venue_id).all()
+        venue = {}
+        venue['past_shows'], venue['upcoming_shows'] = partition_shows(shows)
+        venue['past_shows_count'] = len(venue['past_shows'])
+        venue['upcoming_shows_count'] = len(venue['upcoming_shows'])
+        tags = {f'venue:{venue_id}'} | {f'artist:{show.artist_id}' for show in shows}
+        return render_template('fragments/venue_shows.html', venue=venue), tags, \
+            next_show_start(venue['upcoming_shows'])
+
+    return render_template('pages/show_venue.html', venue={'id': venue_id},
+                           profile=Markup(cache.fragment(f'venue:{venue_id}:{version}', profile)),
+                           shows=Markup(cache.fragment(f'venue:{venue_id}:{version}:shows', shows)))
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@bp.route('/create', methods=['POST'])
+def create_venue_submission():
+    # Done: insert form data as a new Venue record in the db, instead
+    # Done: modify data to be the data object returned from db insertion
+
+    try:
+        venue = Venue(
+            name=request.form['name'],
+            city=request.form['city'],
+            state=request.form['state'],
+            address=request.form['address'],
+            phone=request.form['phone'],
+            genres=selected_genres(),
+            facebook_link=request.form['facebook_link'],
+            image_link=request.form['image_link'],
+            website=request.form['website_link'],
+            seeking_description=request.form['seeking_description']
+        )
+        db.session.add(venue)
+        db.session.commit()
+        cache.invalidate('venues')
+        autocomplete.add(Venue, venue.id, venue.name)
+        # on successful db insert, flash success
+        flash('Venue ' + request.form['name'] + ' was successfully listed!')
+        # Done: on unsuccessful db insert, flash an error instead.
+        # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    except Exception as err:
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed. ' + str(err))
+        db.session.rollback()
+    finally:
+        db.session.close()
+
+    return render_template('pages/home.html')
+
+
+@bp.route('/<venue_id>/delete', methods=['POST'])
+def delete_venue(venue_id):
+    # Done: Complete this endpoint for taking a venue_id, and using
+    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+    try:
+        venue = Venue.query.get(venue_id)
+        release_shows(Show.venue_id == venue_id)
+        Show.query.filter(Show.venue_id == venue_id).delete(synchronize_session=False)
+        db.session.delete(venue)
+        db.session.commit()
+        cache.invalidate('venues', f'venue:{venue_id}', 'shows')
+        autocomplete.remove(Venue, int(venue_id))
+        flash('Venue ' + venue.name + ' was deleted!')
+    except Exception as err:
+        flash('Error deleting Venue! ' + str(err))
+        db.session.rollback()
+    finally:
+        db.session.close()
+
+    return render_template('pages/home.html')
+    # Done: BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+    # clicking that button delete it from the db then redirect the user to the homepage
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    form = VenueForm()
+    venue = Venue.query.get_or_404(venue_id)
+    original = populate_edit_form(form, venue)
+
+    # Done: populate form with values from venue with ID <venue_id>
+    return render_template('forms/edit_venue.html', form=form, venue=venue, original=original)
+
+
+@bp.route('/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    # Done: take values from the form submitted, and update existing
+    # venue record with ID <venue_id> using the new attributes
+    form = VenueForm()
+    try:
+        changes = changed_values(Venue, form, request.form.get('original'))
+        if changes:
+            apply_edit(Venue, venue_id, request.form.get('version', type=int), changes)
+            db.session.commit()
+            cache.invalidate('venues', f'venue:{venue_id}', 'shows')
+            if 'name' in changes:
+                autocomplete.add(Venue, venue_id, changes['name'])
+        flash('Venue updated successfully!')
+    except StaleEdit:
+        db.session.rollback()
+        flash('This venue was changed by someone else since you opened the form. '
+              'Check the current details below and make your edit again.')
+        return edit_venue(venue_id), 409
+    except Exception as err:
+        db.session.rollback()
+        flash('Error updating venue!' + str(err))
+    finally:
+        db.session.close()
+
+    return redirect(url_for('.show_venue', venue_id=venue_id))
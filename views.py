@@ -0,0 +1,122 @@
+from datetime import datetime
+from functools import lru_cache
+
+from flask import Response, abort, current_app, render_template, request, stream_with_context
+
+from forms import Genres
+from models import Genre
+
+# ----------------------------------------------------------------------------#
+# Filters.
+# ----------------------------------------------------------------------------#
+
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+# babel and dateutil are imported on first use: they add a noticeable share
+# of the import time of every worker and only the date filter needs them.
+@lru_cache(maxsize=64)
+def datetime_pattern(format, locale):
+    import babel
+    import babel.dates
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)), babel.Locale.parse(locale)
+
+
+@lru_cache(maxsize=16)
+def display_timezone(name):
+    import babel.dates
+    return babel.dates.get_timezone(name)
+
+
+def format_datetime(value, format='medium'):
+    if not isinstance(value, datetime):
+        import dateutil.parser
+        value = dateutil.parser.parse(str(value))
+    config = current_app.config
+    if config['DATETIME_TIMEZONE']:
+        # Naive values are local times, as stored show times are.
+        value = value.astimezone(display_timezone(config['DATETIME_TIMEZONE']))
+    pattern, locale = datetime_pattern(format, config['DATETIME_LOCALE'])
+    return pattern.apply(value, locale)
+
+
+# ----------------------------------------------------------------------------#
+# Helpers shared by the venue, artist and show views.
+# ----------------------------------------------------------------------------#
+
+def partition_shows(shows):
+    now = datetime.now()
+    past = [show for show in shows if show.start_time <= now]
+    upcoming = [show for show in shows if show.start_time > now]
+    return past, upcoming
+
+
+def next_show_start(upcoming):
+    """``time.time()`` timestamp of the first of ``upcoming``, when it stops being upcoming."""
+    if not upcoming:
+        return None
+    return upcoming[0].start_time.timestamp()
+
+
+def genre_filter():
+    genre = request.args.get('genre')
+    if genre and genre not in {g.value for g in Genres}:
+        abort(400)
+    return genre
+
+
+def time_window():
+    """``(from, to, city)`` of the ``?from=&to=&city=`` filters of the show listings.
+
+    Dates are ISO 8601; values with an offset are converted to local time,
+    which is how naive stored times are read. A malformed date is a 400.
+    """
+    bounds = []
+    for arg in ('from', 'to'):
+        value = request.args.get(arg)
+        try:
+            value = datetime.fromisoformat(value) if value else None
+        except ValueError:
+            abort(400)
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        bounds.append(value)
+    return bounds[0], bounds[1], request.args.get('city') or None
+
+
+def selected_genres():
+    return Genre.query.filter(Genre.name.in_(request.form.getlist('genres'))).all()
+
+
+def render_listing(template_name, **context):
+    """Render a listing page, streamed when ``STREAM_LISTINGS`` is set.
+
+    Streaming sends the layout's header before the rows are fetched and
+    keeps memory flat on big catalogues; such pages bypass the response
+    cache, which only stores fully rendered bodies.
+    """
+    app = current_app._get_current_object()
+    if not app.config['STREAM_LISTINGS']:
+        return render_template(template_name, **context)
+    # Flask 2.0 has no stream_template; this is the recipe from its docs.
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(app.config['STREAM_BUFFER_SIZE'])
+    return Response(stream_with_context(stream))
+
+
+def listing_rows(query):
+    """All rows of ``query``; fetched in chunks from a server-side cursor when streaming."""
+    if current_app.config['STREAM_LISTINGS']:
+        return query.yield_per(current_app.config['STREAM_CHUNK_ROWS'])
+    return query.all()
+
+
+def search_page():
+    config = current_app.config
+    limit = request.form.get('limit', config['SEARCH_RESULTS_PER_PAGE'], type=int)
+    offset = request.form.get('offset', 0, type=int)
+    return max(1, min(limit, config['SEARCH_MAX_RESULTS'])), max(0, offset)